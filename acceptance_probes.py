@@ -0,0 +1,371 @@
+#!/usr/bin/env python3
+"""
+Acceptance probes for Appendix F, run concurrently against a deployment.
+
+    terraform output -json > outputs.json
+    python acceptance_probes.py --outputs outputs.json [-o acceptance_results.json]
+    python acceptance_probes.py --target web_url=http://my-elb.example.com [--target ...]
+    python acceptance_probes.py --stand-in [--delay 0.05]
+
+Every probe is sampled --samples times over pooled keep-alive HTTP/1.1
+connections with a per-request timeout. All probes and endpoints share one
+event loop, so a run takes about as long as the slowest probe however many
+endpoints there are. Targets are named after the Terraform outputs and may
+list several URLs each. --stand-in probes a local server that answers like the
+web app, the monitoring page and Grafana. Results (pass/fail and latency
+percentiles) are written as JSON for the report's acceptance_results block.
+Standard library only.
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import ssl
+import sys
+import time
+from collections import Counter, defaultdict
+from datetime import datetime, timezone
+from urllib.parse import parse_qs, urlencode, urlsplit
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+RESULTS_PATH = os.path.join(HERE, 'acceptance_results.json')
+DEFAULT_SAMPLES = 20
+DEFAULT_TIMEOUT = 5.0
+# Open connections per host; samples beyond this queue for an idle connection
+DEFAULT_PER_HOST = 6
+MAX_BODY = 8 * 1024 * 1024
+PERCENTILES = (50, 95, 99)
+
+# Probe targets are Terraform output names (see outputs.tf)
+PROBES = [
+    {'id': 'AT-01', 'check': 'Landing page returns HTTP 200', 'target': 'web_url', 'path': '/',
+     'contains': 'Capstone Project'},
+    {'id': 'AT-02', 'check': 'Vehicle detail modal is served', 'target': 'web_url', 'path': '/',
+     'contains': 'class="modal'},
+    # The app only renders the receipt after reading the inserted row back. With
+    # the deployment's probe token in `token_header` it then deletes that row, so
+    # the check leaves no lead behind; one sample is enough
+    {'id': 'AT-03', 'check': 'Inquiry form submits and the row is read back', 'target': 'web_url', 'path': '/',
+     'method': 'POST', 'samples': 1, 'contains': 'data-inquiry-stored=', 'token_header': 'X-Acceptance-Probe',
+     'form': {'action': 'submit_inquiry', 'car_id': 'acceptance-probe', 'name': 'Acceptance Probe',
+              'email': 'probe@example.com', 'phone': '', 'message': 'AT-03 automated check'}},
+    # An ELB only answers while at least one instance is InService
+    {'id': 'AT-04', 'check': 'ELB keeps serving (>= 1 InService instance)', 'target': 'web_url', 'path': '/'},
+    {'id': 'AT-05', 'check': 'Monitoring dashboard on port 80', 'target': 'monitoring_dashboard_url', 'path': '/',
+     'contains': 'Monitoring Dashboard'},
+    {'id': 'AT-05', 'check': 'Grafana on port 3000', 'target': 'grafana_dashboard_url', 'path': '/api/health',
+     'contains': '"database"'},
+]
+
+
+class ConnectionPool:
+    """Keep-alive HTTP/1.1 connections, at most `per_host` open to each
+    (scheme, host, port)."""
+
+    def __init__(self, per_host=DEFAULT_PER_HOST):
+        self.per_host = per_host
+        self.idle = defaultdict(list)
+        self.limits = {}
+        self.opened = 0
+
+    async def request(self, url, method='GET', body=b'', headers=None, timeout=DEFAULT_TIMEOUT):
+        """``(status, body, seconds)`` of one request. `timeout` and `seconds`
+        cover the exchange itself, not the wait for a free connection."""
+        parts = urlsplit(url)
+        key = (parts.scheme, parts.hostname, parts.port or (443 if parts.scheme == 'https' else 80))
+        limit = self.limits.setdefault(key, asyncio.Semaphore(self.per_host))
+        async with limit:
+            start = time.perf_counter()
+            while True:
+                reused = bool(self.idle[key])
+                conn = self.idle[key].pop() if reused else None
+                try:
+                    if conn is None:
+                        conn = await asyncio.wait_for(self._open(key), timeout)
+                    remaining = timeout - (time.perf_counter() - start)
+                    status, data, keep = await asyncio.wait_for(
+                        _exchange(*conn, method, parts, body, headers or {}), remaining)
+                except (ConnectionError, asyncio.IncompleteReadError):
+                    if conn is not None:
+                        conn[1].close()
+                    if reused:
+                        continue  # the server closed an idle connection; retry on a new one
+                    raise
+                except BaseException:
+                    if conn is not None:
+                        conn[1].close()
+                    raise
+                break
+            seconds = time.perf_counter() - start
+        if keep:
+            self.idle[key].append(conn)
+        else:
+            conn[1].close()
+        return status, data, seconds
+
+    async def _open(self, key):
+        scheme, host, port = key
+        self.opened += 1
+        return await asyncio.open_connection(host, port, ssl=ssl.create_default_context() if scheme == 'https' else None)
+
+    async def close(self):
+        writers = [writer for conns in self.idle.values() for _, writer in conns]
+        self.idle.clear()
+        for writer in writers:
+            writer.close()
+        await asyncio.gather(*(w.wait_closed() for w in writers), return_exceptions=True)
+
+
+async def _read_headers(reader):
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            return headers
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+
+
+async def _read_chunked(reader):
+    chunks = []
+    while True:
+        size = int((await reader.readline()).split(b';')[0], 16)
+        if size == 0:
+            await _read_headers(reader)  # trailers
+            return b''.join(chunks)
+        chunks.append(await reader.readexactly(size))
+        await reader.readexactly(2)
+
+
+async def _exchange(reader, writer, method, parts, body, headers):
+    """Send one request and read the response: ``(status, body, keep_alive)``."""
+    target = (parts.path or '/') + (f'?{parts.query}' if parts.query else '')
+    lines = [f'{method} {target} HTTP/1.1', f'Host: {parts.netloc}', 'Connection: keep-alive',
+             'User-Agent: acceptance-probes', f'Content-Length: {len(body)}']
+    lines += [f'{name}: {value}' for name, value in headers.items()]
+    writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1') + body)
+    await writer.drain()
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError('connection closed before a response was received')
+    version, status = status_line.decode('latin-1').split()[:2]
+    status = int(status)
+    response_headers = await _read_headers(reader)
+    keep = version == 'HTTP/1.1' and response_headers.get('connection', '').lower() != 'close'
+    if method == 'HEAD' or status in (204, 304) or status < 200:
+        data = b''
+    elif 'chunked' in response_headers.get('transfer-encoding', '').lower():
+        data = await _read_chunked(reader)
+    elif 'content-length' in response_headers:
+        data = await reader.readexactly(int(response_headers['content-length']))
+    else:
+        data = await reader.read(MAX_BODY)
+        keep = False
+    return status, data, keep
+
+
+def percentile(values, p):
+    """Nearest-rank percentile of the sorted list `values`."""
+    return values[max(0, math.ceil(p / 100 * len(values)) - 1)]
+
+
+def _failure(probe, status, data):
+    if status != probe.get('status', 200):
+        return f'HTTP {status}'
+    if probe.get('contains') and probe['contains'].encode('utf-8') not in data:
+        return 'expected content missing'
+    return None
+
+
+async def run_probe(pool, probe, url, samples=DEFAULT_SAMPLES, timeout=DEFAULT_TIMEOUT, token=None):
+    """Sample one probe against one base URL, one request at a time; `token`
+    is sent in the probe's `token_header`, if it has one."""
+    samples = probe.get('samples', samples)
+    timeout = probe.get('timeout', timeout)
+    method = probe.get('method', 'GET')
+    body, headers = b'', {}
+    if probe.get('form'):
+        body = urlencode(probe['form']).encode('utf-8')
+        headers['Content-Type'] = 'application/x-www-form-urlencoded'
+    if token and probe.get('token_header'):
+        headers[probe['token_header']] = token
+    latencies, failures = [], Counter()
+    start = time.perf_counter()
+    for _ in range(samples):
+        try:
+            status, data, seconds = await pool.request(url.rstrip('/') + probe['path'], method, body, headers,
+                                                       timeout)
+        except asyncio.TimeoutError:
+            failures[f'timeout after {timeout:g}s'] += 1
+            continue
+        except (OSError, ValueError, asyncio.IncompleteReadError) as e:
+            failures[f'{type(e).__name__}: {e}'.rstrip(': ')] += 1
+            continue
+        latencies.append(seconds * 1000)
+        reason = _failure(probe, status, data)
+        if reason:
+            failures[reason] += 1
+    latencies.sort()
+    return {
+        'id': probe['id'], 'check': probe['check'], 'target': probe['target'], 'url': url, 'method': method,
+        'samples': samples, 'ok': samples - sum(failures.values()), 'passed': not failures,
+        'failures': dict(failures), 'seconds': round(time.perf_counter() - start, 4),
+        'latency_ms': {f'p{p}': round(percentile(latencies, p), 2) for p in PERCENTILES} | {
+            'max': round(latencies[-1], 2)} if latencies else None,
+    }
+
+
+async def collect(targets, probes=PROBES, samples=DEFAULT_SAMPLES, timeout=DEFAULT_TIMEOUT,
+                  per_host=DEFAULT_PER_HOST, token=None):
+    """Run every probe against every URL of its target concurrently.
+
+    `targets` maps a target name to a list of base URLs. Probes whose target
+    has no URL are reported as skipped.
+    """
+    pool = ConnectionPool(per_host)
+    start = time.perf_counter()
+    jobs, skipped = [], []
+    for probe in probes:
+        urls = targets.get(probe['target']) or []
+        if not urls:
+            skipped.append({'id': probe['id'], 'check': probe['check'], 'target': probe['target'], 'url': None,
+                            'skipped': True, 'passed': False})
+        jobs += [run_probe(pool, probe, url, samples, timeout, token) for url in urls]
+    try:
+        results = await asyncio.gather(*jobs)
+    finally:
+        await pool.close()
+    order = {probe['id']: i for i, probe in enumerate(probes)}
+    return {
+        'run_at': datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M UTC'),
+        'seconds': round(time.perf_counter() - start, 4),
+        'samples': samples, 'timeout': timeout, 'connections': pool.opened,
+        'probes': sorted(results + skipped, key=lambda r: order[r['id']]),
+    }
+
+
+def read_outputs(path):
+    """Targets from ``terraform output -json`` (empty outputs are left out)."""
+    with open(path, encoding='utf-8') as f:
+        outputs = json.load(f)
+    targets = {}
+    for name, output in outputs.items():
+        value = output.get('value') if isinstance(output, dict) else output
+        urls = value if isinstance(value, list) else [value]
+        urls = [u for u in urls if isinstance(u, str) and u.startswith(('http://', 'https://'))]
+        if urls:
+            targets[name] = urls
+    return targets
+
+
+STAND_IN_PAGE = ('<html><head><title>Capstone Project - Premium Car Dealership</title></head><body>'
+                 '<div id="carModal" class="modal"><div class="modal-content"></div></div>{extra}</body></html>')
+STAND_IN_MONITORING = '<html><head><title>Capstone Project Monitoring Dashboard</title></head></html>'
+
+
+def _stand_in_response(method, target, body):
+    path = urlsplit(target).path
+    if path == '/api/health':
+        return 200, '{"commit": "stand-in", "database": "ok"}'
+    if path.rstrip('/') == '/monitoring':
+        return 200, STAND_IN_MONITORING
+    if path != '/':
+        return 404, 'not found'
+    if method == 'POST' and parse_qs(body.decode('utf-8')).get('action') == ['submit_inquiry']:
+        return 200, STAND_IN_PAGE.format(extra='<div id="inquiry-receipt" data-inquiry-stored="1" hidden></div>'
+                                               '<script>showSuccessAlert("Your inquiry has been submitted '
+                                               'successfully.")</script>')
+    return 200, STAND_IN_PAGE.format(extra='')
+
+
+async def stand_in(delay=0.0, host='127.0.0.1', port=0):
+    """Start a keep-alive HTTP server that answers like the web app (``/``),
+    the monitoring page (``/monitoring``) and Grafana (``/api/health``),
+    waiting `delay` seconds before every response."""
+
+    async def handle(reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, target = request_line.decode('latin-1').split()[:2]
+                headers = await _read_headers(reader)
+                body = await reader.readexactly(int(headers.get('content-length', 0)))
+                await asyncio.sleep(delay)
+                status, page = _stand_in_response(method, target, body)
+                data = page.encode('utf-8')
+                writer.write(f'HTTP/1.1 {status} {"OK" if status == 200 else "Not Found"}\r\n'
+                             f'Content-Type: text/html\r\nContent-Length: {len(data)}\r\n\r\n'.encode() + data)
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.CancelledError):
+            pass  # client went away, or the server is shutting down
+        finally:
+            writer.close()
+
+    return await asyncio.start_server(handle, host, port)
+
+
+def stand_in_targets(server):
+    base = 'http://%s:%d' % server.sockets[0].getsockname()[:2]
+    return {'web_url': [base], 'monitoring_dashboard_url': [base + '/monitoring'], 'grafana_dashboard_url': [base]}
+
+
+async def _run_stand_in(delay, **kwargs):
+    server = await stand_in(delay)
+    async with server:
+        return await collect(stand_in_targets(server), **kwargs)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--outputs', help='targets from `terraform output -json` saved to a file')
+    parser.add_argument('--target', action='append', default=[], metavar='NAME=URL',
+                        help='probe target by Terraform output name (repeatable; several URLs per name allowed)')
+    parser.add_argument('--probes', help='JSON list of probes (default: AT-01..AT-05)')
+    parser.add_argument('--samples', type=int, default=DEFAULT_SAMPLES, help='requests per probe and endpoint')
+    parser.add_argument('--timeout', type=float, default=DEFAULT_TIMEOUT, help='seconds per request')
+    parser.add_argument('--per-host', type=int, default=DEFAULT_PER_HOST, help='keep-alive connections per host')
+    parser.add_argument('--probe-token', default=os.environ.get('ACCEPTANCE_PROBE_TOKEN'),
+                        help='shared secret for AT-03 cleanup (Terraform acceptance_probe_token; '
+                             'default: $ACCEPTANCE_PROBE_TOKEN)')
+    parser.add_argument('--stand-in', action='store_true', help='probe a local stand-in server instead')
+    parser.add_argument('--delay', type=float, default=0.0, help='stand-in response delay in seconds')
+    parser.add_argument('-o', '--output', default=RESULTS_PATH, help=f'results file (default: {RESULTS_PATH})')
+    args = parser.parse_args(argv)
+
+    probes = PROBES
+    if args.probes:
+        with open(args.probes, encoding='utf-8') as f:
+            probes = json.load(f)
+    options = dict(probes=probes, samples=args.samples, timeout=args.timeout, per_host=args.per_host,
+                   token=args.probe_token)
+    if args.stand_in:
+        results = asyncio.run(_run_stand_in(args.delay, **options))
+    else:
+        targets = read_outputs(args.outputs) if args.outputs else {}
+        for item in args.target:
+            name, sep, url = item.partition('=')
+            if not sep:
+                parser.error(f'--target expects NAME=URL, got {item!r}')
+            targets.setdefault(name, []).append(url)
+        if not targets:
+            parser.error('give --outputs, --target or --stand-in')
+        results = asyncio.run(collect(targets, **options))
+
+    tmp = f'{args.output}.{os.getpid()}.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    os.replace(tmp, args.output)
+    failed = [r for r in results['probes'] if not r['passed']]
+    print(f'{args.output}: {len(results["probes"]) - len(failed)} of {len(results["probes"])} probes passed '
+          f'in {results["seconds"]:.2f}s over {results["connections"]} connections')
+    for r in failed:
+        reason = 'skipped (no target)' if r.get('skipped') else ', '.join(f'{k} x{v}' for k, v in r['failures'].items())
+        print(f'  {r["id"]} {r["check"]} [{r["url"]}]: {reason}', file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,366 @@
+#!/usr/bin/env python3
+"""
+Benchmarks for create_final_report.py.
+
+Table scaling: python bench_report.py tables [--rows 10 100 1000 10000 50000]
+Report suite:  python bench_report.py report [--pages 10 100 1000 5000] [--table-rows 20000]
+               [--update-baseline]
+Cost sweep:    python bench_report.py costs [--scenarios 1000000]
+Probes:        python bench_report.py probes [--endpoints 300] [--delay 0.1]
+Merge:         python bench_report.py merge [--docs 10 100 300]
+Inventory:     python bench_report.py inventory [--cars 1000000] [--inquiries 100000]
+Formats:       python bench_report.py formats [--pages 100 1000]
+
+The table benchmark times add_table on its own and a one-table report built
+through generate_report (fragment compile, splice and save), so a slowdown on
+the real build path shows up next to the helper's numbers.
+
+The report suite builds synthetic report specs (paragraphs, bullet lists,
+ASCII diagram lines and tables) through generate_report with no artifact
+cache, one size per child process, plus one report that is a single table of
+--table-rows rows, and records build time (compile, splice and save), save
+time on its own, peak RSS and output size. Results are compared against a
+baseline file; the exit status is 1 if any metric regresses by more than
+--threshold.
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+from docx import Document
+from docx.enum.table import WD_TABLE_ALIGNMENT
+
+import create_final_report as report
+
+LEGACY_MAX_ROWS = 100
+DEFAULT_PAGES = [10, 100, 1000, 5000]
+DEFAULT_TABLE_ROWS = 20000
+BASELINE_PATH = os.path.join(report.HERE, 'bench_baseline.json')
+METRICS = ('build_s', 'save_s', 'peak_rss_mb', 'size_bytes')
+PAGES_PER_SECTION = 5
+# Time differences below this many seconds are treated as noise
+TIME_NOISE_FLOOR = 0.05
+
+LOREM = ('Infrastructure changes are planned, reviewed and applied through the pipeline, with every '
+         'module validated before deployment and verified afterwards through health checks. ')
+
+
+def legacy_add_table(doc, rows):
+    # The original cell-by-cell implementation, kept for comparison only
+    t = doc.add_table(rows=len(rows), cols=len(rows[0]))
+    t.style = 'Table Grid'
+    t.alignment = WD_TABLE_ALIGNMENT.CENTER
+    for i, row in enumerate(rows):
+        for j, cell in enumerate(row):
+            t.cell(i, j).text = str(cell)
+            if i == 0:
+                for pr in t.cell(i, j).paragraphs:
+                    for r in pr.runs:
+                        r.bold = True
+
+
+def synthetic_rows(n, cols=4):
+    rows = [['ID', 'Item', 'Severity', 'Notes']]
+    for i in range(n):
+        rows.append((f'R-{i:05d}', f'Resource {i}', ('Low', 'Medium', 'High')[i % 3],
+                     'Tracked in the risk register & reviewed weekly'))
+    return [r[:cols] for r in rows]
+
+
+def time_table(fn, rows):
+    doc = Document()
+    report.set_default_style(doc)
+    start = time.perf_counter()
+    fn(doc, rows)
+    return time.perf_counter() - start
+
+
+def time_report_table(rows, path):
+    # The whole build path: fragment compile, splice and save
+    spec = {'sections': [{'id': 'table', 'blocks': [{'type': 'table', 'rows': rows}]}]}
+    start = time.perf_counter()
+    report.generate_report(path, False, spec, None)
+    return time.perf_counter() - start
+
+
+def bench_tables(sizes):
+    print(f'{"rows":>8} {"bulk (s)":>10} {"rows/s":>12} {"legacy (s)":>11} {"speedup":>8} {"report (s)":>11} '
+          f'{"rows/s":>10}')
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in sizes:
+            rows = synthetic_rows(n)
+            bulk = time_table(report.add_table, rows)
+            if n <= LEGACY_MAX_ROWS:
+                legacy = time_table(legacy_add_table, rows)
+                legacy_col, speedup = f'{legacy:11.3f}', f'{legacy / bulk:7.1f}x'
+            else:
+                legacy_col, speedup = f'{"skipped":>11}', f'{"-":>8}'
+            built = time_report_table(rows, os.path.join(tmp, 'table.docx'))
+            print(f'{n:>8} {bulk:10.3f} {n / bulk:12.0f} {legacy_col} {speedup} {built:11.3f} {n / built:10.0f}')
+
+
+def synthetic_spec(pages, table_rows=0):
+    """A report spec of roughly `pages` double-spaced pages. Each page is one
+    ~100-word paragraph, a four-item bullet list, four diagram lines and a
+    small table, grouped into chapters of PAGES_PER_SECTION pages. With
+    `table_rows`, an appendix holds one table of that many rows."""
+    sections = []
+    for start in range(0, pages, PAGES_PER_SECTION):
+        blocks = []
+        for page in range(start, min(start + PAGES_PER_SECTION, pages)):
+            blocks += [
+                {'type': 'heading', 'text': f'{page + 1}.1 Page {page + 1}', 'level': 2},
+                {'type': 'paragraph', 'text': LOREM * 4},
+                {'type': 'bullets', 'items': [f'Check {page}-{i}: instance status and ELB health' for i in range(4)]},
+                {'type': 'lines', 'lines': [f'  Tier {i} [SG {page}] <-> Tier {i + 1}' for i in range(4)]},
+                {'type': 'table', 'rows': [['Resource', 'State', 'Owner']] +
+                    [[f'res-{page}-{i}', 'available', 'terraform'] for i in range(3)]},
+            ]
+        sections.append({'id': f'chapter-{start}', 'title': f'Chapter {start // PAGES_PER_SECTION + 1}',
+                         'blocks': blocks})
+    if table_rows:
+        sections.append({'id': 'appendix', 'title': 'Appendix',
+                         'blocks': [{'type': 'table', 'rows': synthetic_rows(table_rows)}]})
+    return {'sections': sections}
+
+
+def run_report_size(pages, stream, table_rows=0):
+    """Build one synthetic report through generate_report (fragment compile,
+    splice and save, uncached) in this process; return its metrics, with the
+    save_document call also timed on its own."""
+    spec = synthetic_spec(pages, table_rows)
+    saves = []
+    save_document = report.save_document
+
+    def timed_save(doc, path):
+        start = time.perf_counter()
+        save_document(doc, path)
+        saves.append(time.perf_counter() - start)
+
+    report.save_document = timed_save
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'bench.docx')
+            start = time.perf_counter()
+            report.generate_report(path, stream, spec, None)
+            built = time.perf_counter()
+            size = os.path.getsize(path)
+    finally:
+        report.save_document = save_document
+    return {
+        'build_s': built - start,
+        'save_s': sum(saves),
+        # ru_maxrss is in kilobytes on Linux
+        'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        'size_bytes': size,
+    }
+
+
+def measure(pages, stream, repeat, table_rows=0):
+    # A fresh interpreter per run keeps peak RSS per size honest
+    runs = []
+    for _ in range(repeat):
+        out = subprocess.run([sys.executable, __file__, '_child', str(pages), '--table-rows', str(table_rows)]
+                             + (['--stream'] if stream else []), check=True, capture_output=True, text=True).stdout
+        runs.append(json.loads(out))
+    return {metric: min(run[metric] for run in runs) for metric in METRICS}
+
+
+def load_baseline(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def regressed(metric, old, new, threshold):
+    if metric.endswith('_s') and new - old < TIME_NOISE_FLOOR:
+        return False
+    return old > 0 and (new - old) / old > threshold
+
+
+def bench_report(pages_list, stream, repeat, baseline_path, threshold, update, table_rows=0):
+    mode = 'stream' if stream else 'memory'
+    baseline = load_baseline(baseline_path)
+    regressions = []
+    # Each page count, then (with table_rows) a report that is one large table
+    cases = [(pages, 0) for pages in pages_list] + ([(0, table_rows)] if table_rows else [])
+    print(f'{"report":>12} {"build (s)":>10} {"save (s)":>9} {"RSS (MB)":>9} {"size (KB)":>10}  vs baseline')
+    for pages, rows in cases:
+        key = f'{mode}:table:{rows}' if rows else f'{mode}:{pages}'
+        result = measure(pages, stream, repeat, rows)
+        base = baseline.get(key)
+        notes = []
+        if base:
+            for metric in METRICS:
+                if regressed(metric, base[metric], result[metric], threshold):
+                    regressions.append((key, metric, base[metric], result[metric]))
+                    notes.append(f'{metric} {(result[metric] - base[metric]) / base[metric]:+.0%}')
+        label = f'{rows} rows' if rows else f'{pages} pages'
+        print(f'{label:>12} {result["build_s"]:10.3f} {result["save_s"]:9.3f} {result["peak_rss_mb"]:9.1f} '
+              f'{result["size_bytes"] / 1024:10.0f}  '
+              f'{"REGRESSED: " + ", ".join(notes) if notes else "ok" if base else "no baseline"}')
+        if update:
+            baseline[key] = result
+    if update:
+        with open(baseline_path, 'w', encoding='utf-8') as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+        print(f'baseline written to {baseline_path}')
+        return 0
+    for key, metric, old, new in regressions:
+        print(f'regression: {key} {metric} {old:.4g} -> {new:.4g} (threshold {threshold:.0%})')
+    return 1 if regressions else 0
+
+
+def bench_costs(target, repeat):
+    import cost_model
+    # Stretch the transfer axis until the grid holds at least `target` scenarios
+    base = cost_model.ScenarioGrid().size // len(cost_model.DEFAULT_AXES['transfer_gb'])
+    steps = -(-target // base)
+    axes = {'transfer_gb': [50 * (i + 1) for i in range(steps)]}
+    size = cost_model.ScenarioGrid(axes).size
+    best = min(_timed(cost_model.sweep, axes) for _ in range(repeat))
+    print(f'{size:,} scenarios swept in {best:.3f}s ({size / best / 1e6:.1f}M scenarios/s)')
+
+
+def bench_probes(endpoints, delay, samples):
+    import asyncio
+    import acceptance_probes as probes
+
+    async def run():
+        # One stand-in server per endpoint, so each is its own host to the pool
+        servers = [await probes.stand_in(delay) for _ in range(endpoints)]
+        targets = {}
+        for server in servers:
+            for name, urls in probes.stand_in_targets(server).items():
+                targets.setdefault(name, []).extend(urls)
+        try:
+            return await probes.collect(targets, samples=samples)
+        finally:
+            for server in servers:
+                server.close()
+
+    results = asyncio.run(run())
+    runs = results['probes']
+    slowest = max(r['seconds'] for r in runs)
+    print(f'{len(runs)} probe runs ({endpoints} endpoints x {len(probes.PROBES)} probes, {samples} samples, '
+          f'{delay * 1000:.0f} ms stand-in delay) in {results["seconds"]:.3f}s; slowest probe {slowest:.3f}s; '
+          f'{sum(r["passed"] for r in runs)} passed over {results["connections"]} connections')
+
+
+def bench_merge(counts):
+    import merge_reports
+    sources = [os.path.join(report.HERE, name)
+               for name in ('Final Project Report_JA.docx', 'research_paper_capstone_JA.docx')]
+    with tempfile.TemporaryDirectory() as tmp:
+        output = os.path.join(tmp, 'compendium.docx')
+        for count in counts:
+            paths = [sources[i % len(sources)] for i in range(count)]
+            size = sum(os.path.getsize(p) for p in paths)
+            seconds = _timed(merge_reports.merge, paths, output)
+            print(f'{count:>5} documents  {size / 1e6:7.1f} MB in  {seconds:7.3f}s  '
+                  f'{seconds / count * 1000:6.1f} ms/document  {size / seconds / 1e6:6.1f} MB/s')
+
+
+def bench_inventory(cars, inquiries):
+    import inventory_db
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'inventory.sqlite')
+        seconds = _timed(inventory_db.create_stand_in, path, cars, inquiries)
+        print(f'stand-in: {cars:,} cars, {inquiries:,} inquiries written in {seconds:.1f}s')
+        url = f'sqlite:///{path}'
+        spec = {'sections': [{'id': 'inventory', 'title': 'Inventory',
+                              'blocks': [{'type': 'inventory', 'database': url, 'listing': False}]}]}
+        seconds = _timed(report.expand_section, spec['sections'][0], None)
+        print(f'aggregates: {seconds:.2f}s')
+        listing = {'id': 'listing', 'blocks': [{'type': 'inventory_listing', 'database': url}]}
+        output = os.path.join(tmp, 'listing.docx')
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        seconds = _timed(report.generate_report, output, True, {'sections': [listing]}, None)
+        grown = (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss) / 1024
+        print(f'streamed listing: {cars:,} rows in {seconds:.1f}s ({cars / seconds:,.0f} rows/s), '
+              f'{os.path.getsize(output) / 1e6:.1f} MB .docx, peak RSS grew {grown:.0f} MB')
+
+
+def bench_formats(pages_list, repeat):
+    """Uncached builds of synthetic reports as .docx alone and as .docx,
+    Markdown and HTML together (one pass over the spec)."""
+    with tempfile.TemporaryDirectory() as tmp:
+        docx, md, html = (os.path.join(tmp, name) for name in ('bench.docx', 'bench.md', 'bench.html'))
+        for pages in pages_list:
+            spec = synthetic_spec(pages)
+            alone = min(_timed(report.generate_report, docx, False, spec, None) for _ in range(repeat))
+            together = min(_timed(lambda: report.generate_report(docx, False, spec, None, markdown=md, html=html))
+                           for _ in range(repeat))
+            print(f'{pages:>6} pages  docx {alone:7.2f}s  docx+md+html {together:7.2f}s  '
+                  f'({(together - alone) / alone:+.1%})')
+
+
+def _timed(fn, *args):
+    start = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    sub = parser.add_subparsers(dest='command', required=True)
+    tables = sub.add_parser('tables', help='add_table and generate_report scaling from 10 to 50k rows')
+    tables.add_argument('--rows', type=int, nargs='+', default=[10, 100, 1000, 10000, 50000])
+    suite = sub.add_parser('report', help='synthetic report suite with baseline regression check')
+    suite.add_argument('--pages', type=int, nargs='+', default=DEFAULT_PAGES)
+    suite.add_argument('--stream', action='store_true', help='benchmark the streaming writer')
+    suite.add_argument('--repeat', type=int, default=1, help='runs per size; the best is kept')
+    suite.add_argument('--baseline', default=BASELINE_PATH)
+    suite.add_argument('--threshold', type=float, default=0.25,
+                       help='allowed relative regression per metric (default 0.25 = 25%%)')
+    suite.add_argument('--update-baseline', action='store_true')
+    suite.add_argument('--table-rows', type=int, default=DEFAULT_TABLE_ROWS,
+                       help='rows in the large-table case (0 skips it)')
+    costs = sub.add_parser('costs', help='cost_model.sweep over a grid of at least --scenarios scenarios')
+    costs.add_argument('--scenarios', type=int, default=1000000)
+    costs.add_argument('--repeat', type=int, default=3, help='runs; the best is reported')
+    probe = sub.add_parser('probes', help='acceptance probes against many local stand-in endpoints')
+    probe.add_argument('--endpoints', type=int, default=300)
+    probe.add_argument('--delay', type=float, default=0.1, help='stand-in response delay in seconds')
+    probe.add_argument('--samples', type=int, default=5)
+    merge = sub.add_parser('merge', help='merge_reports.merge over packs of the bundled reports')
+    merge.add_argument('--docs', type=int, nargs='+', default=[10, 100, 300])
+    inventory = sub.add_parser('inventory', help='Appendix G queries and streamed listing on a stand-in database')
+    inventory.add_argument('--cars', type=int, default=1000000)
+    inventory.add_argument('--inquiries', type=int, default=100000)
+    formats = sub.add_parser('formats', help='.docx alone vs .docx, Markdown and HTML from one build')
+    formats.add_argument('--pages', type=int, nargs='+', default=[100, 1000])
+    formats.add_argument('--repeat', type=int, default=3, help='runs per size; the best is kept')
+    child = sub.add_parser('_child')
+    child.add_argument('pages', type=int)
+    child.add_argument('--stream', action='store_true')
+    child.add_argument('--table-rows', type=int, default=0)
+    args = parser.parse_args()
+    if args.command == 'tables':
+        bench_tables(args.rows)
+    elif args.command == 'report':
+        return bench_report(args.pages, args.stream, args.repeat, args.baseline, args.threshold,
+                            args.update_baseline, args.table_rows)
+    elif args.command == 'costs':
+        bench_costs(args.scenarios, args.repeat)
+    elif args.command == 'probes':
+        bench_probes(args.endpoints, args.delay, args.samples)
+    elif args.command == 'merge':
+        bench_merge(args.docs)
+    elif args.command == 'inventory':
+        bench_inventory(args.cars, args.inquiries)
+    elif args.command == 'formats':
+        bench_formats(args.pages, args.repeat)
+    elif args.command == '_child':
+        print(json.dumps(run_report_size(args.pages, args.stream, args.table_rows)))
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,182 @@
+"""
+Monthly AWS cost model for the deployed architecture (Section 13).
+
+A scenario picks one value on every axis of a grid (web instance type, ASG
+min/max, average ASG load, Aurora class, instance count and storage, NAT
+gateways, data transfer, monitoring instance type). Each tier's cost is an
+array shaped to broadcast over the grid, so the whole sweep is a handful of
+numpy operations with no Python loop per scenario. Requires numpy.
+"""
+import numpy as np
+
+HOURS_PER_MONTH = 730
+
+# us-east-1 on-demand list prices, USD per hour unless noted
+EC2_HOURLY = {
+    't2.nano': 0.0058, 't2.micro': 0.0116, 't2.small': 0.023,
+    't3.nano': 0.0052, 't3.micro': 0.0104, 't3.small': 0.0208, 't3.medium': 0.0416, 't3.large': 0.0832,
+    'm5.large': 0.096,
+}
+AURORA_HOURLY = {
+    'db.t3.small': 0.041, 'db.t3.medium': 0.082, 'db.t4g.medium': 0.073,
+    'db.r6g.large': 0.26, 'db.r5.large': 0.29, 'db.r5.xlarge': 0.58,
+}
+AURORA_STORAGE_GB_MONTH = 0.10
+AURORA_IO_PER_MILLION = 0.20
+AURORA_IO_MILLIONS_PER_GB = 0.5
+ELB_HOURLY = 0.025
+ELB_PER_GB = 0.008
+NAT_HOURLY = 0.045
+NAT_PER_GB = 0.045
+PUBLIC_IPV4_HOURLY = 0.005
+TRANSFER_OUT_PER_GB = 0.09
+TRANSFER_FREE_GB = 100
+# Share of outbound traffic that leaves through the NAT gateway (the web tier
+# sits in public subnets; only private-subnet traffic is NAT-processed)
+NAT_TRAFFIC_SHARE = 0.1
+
+TIERS = {
+    'web': 'Web tier (EC2)',
+    'load_balancer': 'Load balancer (ELB)',
+    'database': 'Aurora MySQL',
+    'nat': 'NAT gateway + EIP',
+    'data_transfer': 'Data transfer out',
+    'monitoring': 'Monitoring (EC2)',
+}
+
+DEFAULT_AXES = {
+    'web_type': ['t3.micro', 't3.small', 't3.medium', 't3.large', 't2.micro', 'm5.large'],
+    'asg_min': [1, 2, 3, 4],
+    'asg_max': [1, 2, 3, 4, 6, 8],
+    'asg_load': [0.0, 0.25, 0.5, 0.75, 1.0],
+    'db_class': ['db.t3.medium', 'db.t4g.medium', 'db.r6g.large', 'db.r5.large', 'db.r5.xlarge'],
+    'db_instances': [1, 2, 3],
+    'db_storage_gb': [20, 100, 500],
+    'nat_gateways': [1, 2],
+    'transfer_gb': [50, 100, 250, 500, 1000, 2500, 5000],
+    'monitoring_type': ['t2.nano', 't3.micro'],
+}
+
+# Grid dimensions; asg_min and asg_max share one axis of valid (min <= max) pairs
+DIMENSIONS = ('web_type', 'asg', 'asg_load', 'db_class', 'db_instances', 'db_storage_gb', 'nat_gateways',
+              'transfer_gb', 'monitoring_type')
+
+
+def _price(table, names):
+    missing = [n for n in names if n not in table]
+    if missing:
+        raise KeyError(f'no price for {", ".join(missing)}')
+    return np.array([table[n] for n in names])
+
+
+class ScenarioGrid:
+    """The cartesian product of `axes` (see DEFAULT_AXES), without materializing it."""
+
+    def __init__(self, axes=None):
+        self.axes = dict(DEFAULT_AXES, **(axes or {}))
+        pairs = [(lo, hi) for lo in self.axes['asg_min'] for hi in self.axes['asg_max'] if lo <= hi]
+        if not pairs:
+            raise ValueError('no ASG size with asg_min <= asg_max')
+        self.asg_pairs = pairs
+        self.values = {dim: self.axes[dim] for dim in DIMENSIONS if dim != 'asg'}
+        self.values['asg'] = [f'{lo}-{hi}' for lo, hi in pairs]
+        self.shape = tuple(len(self.values[dim]) for dim in DIMENSIONS)
+        self.size = int(np.prod(self.shape))
+
+    def axis(self, dim, values):
+        """`values` (one per point on `dim`) shaped to broadcast along `dim`."""
+        shape = [1] * len(DIMENSIONS)
+        shape[DIMENSIONS.index(dim)] = -1
+        return np.asarray(values, dtype=np.float64).reshape(shape)
+
+    def scenario(self, flat_index):
+        """The axis values of one scenario, by flat index into the grid."""
+        index = np.unravel_index(flat_index, self.shape)
+        return {dim: self.values[dim][i] for dim, i in zip(DIMENSIONS, index)}
+
+
+def tier_costs(grid):
+    """Monthly cost per tier, each an array broadcastable to `grid.shape`."""
+    ax = grid.axis
+    lo = ax('asg', [p[0] for p in grid.asg_pairs])
+    hi = ax('asg', [p[1] for p in grid.asg_pairs])
+    web_instances = lo + ax('asg_load', grid.axes['asg_load']) * (hi - lo)
+    transfer = ax('transfer_gb', grid.axes['transfer_gb'])
+    storage = ax('db_storage_gb', grid.axes['db_storage_gb'])
+    return {
+        'web': web_instances * ax('web_type', _price(EC2_HOURLY, grid.axes['web_type'])) * HOURS_PER_MONTH,
+        'load_balancer': ELB_HOURLY * HOURS_PER_MONTH + ELB_PER_GB * transfer,
+        'database': (ax('db_instances', grid.axes['db_instances'])
+                     * ax('db_class', _price(AURORA_HOURLY, grid.axes['db_class'])) * HOURS_PER_MONTH
+                     + storage * (AURORA_STORAGE_GB_MONTH + AURORA_IO_MILLIONS_PER_GB * AURORA_IO_PER_MILLION)),
+        'nat': (ax('nat_gateways', grid.axes['nat_gateways']) * (NAT_HOURLY + PUBLIC_IPV4_HOURLY) * HOURS_PER_MONTH
+                + NAT_PER_GB * NAT_TRAFFIC_SHARE * transfer),
+        'data_transfer': TRANSFER_OUT_PER_GB * np.maximum(transfer - TRANSFER_FREE_GB, 0),
+        'monitoring': ax('monitoring_type', _price(EC2_HOURLY, grid.axes['monitoring_type'])) * HOURS_PER_MONTH,
+    }
+
+
+def monthly_totals(grid, tiers=None):
+    """Total monthly cost of every scenario as a flat float64 array."""
+    tiers = tier_costs(grid) if tiers is None else tiers
+    total = np.zeros(grid.shape)
+    for cost in tiers.values():
+        total += cost
+    return total.reshape(-1)
+
+
+def breakdown(grid, tiers, flat_index):
+    """Per-tier monthly cost of one scenario."""
+    index = np.unravel_index(flat_index, grid.shape)
+    return {name: float(np.broadcast_to(cost, grid.shape)[index]) for name, cost in tiers.items()}
+
+
+def cheapest_by(grid, total, dim):
+    """Flat index of the cheapest scenario for every value on `dim`."""
+    axis = DIMENSIONS.index(dim)
+    moved = np.moveaxis(total.reshape(grid.shape), axis, 0).reshape(grid.shape[axis], -1)
+    best = moved.argmin(axis=1)
+    # Map (value on dim, position among the rest) back to a flat grid index
+    rest = [n for i, n in enumerate(grid.shape) if i != axis]
+    index = list(np.unravel_index(best, rest))
+    index.insert(axis, np.arange(grid.shape[axis]))
+    return np.ravel_multi_index(index, grid.shape)
+
+
+def sweep(axes=None, current=None, by='web_type', percentiles=(5, 25, 50, 75, 95)):
+    """Evaluate every scenario of the grid and summarize it.
+
+    Returns ``scenarios``, ``min``/``max``, ``percentiles`` (value per
+    percentile), ``cheapest`` (the cheapest scenario for each value of the `by`
+    axis, cheapest first, with its total) and ``breakdown`` (per-tier costs of
+    the cheapest, median and 95th percentile scenarios, plus `current` when
+    given as a one-value-per-axis dict).
+    """
+    grid = ScenarioGrid(axes)
+    tiers = tier_costs(grid)
+    total = monthly_totals(grid, tiers)
+    cheapest = cheapest_by(grid, total, by)
+    cheapest = cheapest[np.argsort(total[cheapest], kind='stable')]
+    # Percentiles as order statistics, so each one is an actual scenario
+    ranks = [min(total.size - 1, int(round(p / 100 * (total.size - 1)))) for p in percentiles]
+    partitioned = np.argpartition(total, ranks)
+    at_rank = {p: int(partitioned[r]) for p, r in zip(percentiles, ranks)}
+    summary = {
+        'scenarios': grid.size,
+        'min': float(total[cheapest[0]]),
+        'max': float(total.max()),
+        'percentiles': {p: float(total[i]) for p, i in at_rank.items()},
+        'cheapest': [dict(grid.scenario(i), total=float(total[i])) for i in cheapest],
+        'breakdown': {'Cheapest': breakdown(grid, tiers, int(cheapest[0]))},
+    }
+    for label, p in (('Median', 50), ('95th percentile', 95)):
+        if p in at_rank:
+            summary['breakdown'][label] = breakdown(grid, tiers, at_rank[p])
+    if current:
+        missing = set(DEFAULT_AXES) - set(current)
+        if missing:
+            raise ValueError(f'current configuration is missing {", ".join(sorted(missing))}')
+        one = ScenarioGrid({key: [value] for key, value in current.items()})
+        summary['breakdown'] = dict({'Current configuration': breakdown(one, tier_costs(one), 0)},
+                                    **summary['breakdown'])
+    return summary
@@ -0,0 +1,306 @@
+"""
+Summaries of the Terraform modules and the Jenkinsfile for the report.
+
+parse_hcl() reads the block structure of a .tf file (resources, variables,
+outputs, modules and their nested blocks, with attribute values kept as source
+text); parse_jenkinsfile() finds the pipeline stages and what they run. Both
+are pure functions of the file contents, so ParseCache keys their results on
+a content hash and never parses an unchanged file twice.
+"""
+import glob
+import hashlib
+import json
+import os
+import re
+
+# Bump when a parser's output changes so cached results are not reused
+PARSER_VERSION = 1
+
+_IDENT = re.compile(r'[A-Za-z_][\w-]*')
+_HEREDOC = re.compile(r'<<-?([A-Za-z_]\w*)[ \t]*\n')
+_STAGE = re.compile(r'''\bstage\s*\(\s*(['"])(.*?)\1\s*\)\s*\{''')
+_ACTION = re.compile(r'''params\.ACTION\s*==\s*['"](\w+)['"]''')
+_TARGET = re.compile(r'-target=module\.(\w+)')
+_TF_COMMAND_ORDER = ['init', 'validate', 'plan', 'apply', 'destroy', 'output', 'show', 'refresh', 'import', 'state']
+_TF_COMMAND = re.compile(rf'\bterraform\s+({"|".join(_TF_COMMAND_ORDER)})\b')
+_CREDENTIAL = re.compile(r'''credentialsId\s*:\s*['"]([^'"]+)['"]''')
+
+
+def _skip_string(text, i, groovy=False):
+    """Index just past the string literal starting at text[i]."""
+    for quote in ("'''", '"""') if groovy else ():
+        if text.startswith(quote, i):
+            end = text.find(quote, i + 3)
+            return len(text) if end < 0 else end + 3
+    quote = text[i]
+    i += 1
+    while i < len(text):
+        c = text[i]
+        if c == '\\':
+            i += 2
+        elif c == quote:
+            return i + 1
+        elif c == '$' and quote == '"' and text.startswith('${', i):
+            # Interpolations may contain quotes and braces of their own
+            i = _skip_braces(text, i + 1, groovy)
+        else:
+            i += 1
+    return i
+
+
+def _skip_comment(text, i, groovy=False):
+    """Index just past a comment starting at text[i], or None if there is none."""
+    if text.startswith('/*', i):
+        end = text.find('*/', i + 2)
+        return len(text) if end < 0 else end + 2
+    if text.startswith('//', i) or (not groovy and text[i] == '#'):
+        end = text.find('\n', i)
+        return len(text) if end < 0 else end
+    return None
+
+
+def _skip_heredoc(text, i):
+    m = _HEREDOC.match(text, i)
+    if not m:
+        return None
+    end = re.compile(rf'^[ \t]*{m.group(1)}[ \t]*$', re.M).search(text, m.end())
+    return len(text) if end is None else end.end()
+
+
+def _skip_braces(text, i, groovy=False):
+    """Index just past the bracket closing the one at text[i]; strings,
+    comments and heredocs are skipped."""
+    depth = 0
+    n = len(text)
+    while i < n:
+        c = text[i]
+        if c in '{[(':
+            depth += 1
+        elif c in '}])':
+            depth -= 1
+            if depth == 0:
+                return i + 1
+        elif c == '"' or (groovy and c == "'"):
+            i = _skip_string(text, i, groovy)
+            continue
+        elif c in '/#':
+            end = _skip_comment(text, i, groovy)
+            if end is not None:
+                i = end
+                continue
+        elif c == '<' and not groovy:
+            end = _skip_heredoc(text, i)
+            if end is not None:
+                i = end
+                continue
+        i += 1
+    raise ValueError(f'unbalanced brackets from offset {i}')
+
+
+def _value_end(text, i):
+    """End of the attribute value starting at text[i]: the first newline (or
+    comma) outside brackets, strings and heredocs."""
+    n = len(text)
+    while i < n:
+        c = text[i]
+        if c in '\n,':
+            return i
+        if c in '{[(':
+            i = _skip_braces(text, i)
+        elif c == '"':
+            i = _skip_string(text, i)
+        elif c in '/#' and _skip_comment(text, i) is not None:
+            return i
+        elif c == '<' and _skip_heredoc(text, i) is not None:
+            i = _skip_heredoc(text, i)
+        else:
+            i += 1
+    return n
+
+
+def _clean_value(raw):
+    raw = raw.strip()
+    if len(raw) >= 2 and raw[0] == raw[-1] == '"' and _skip_string(raw, 0) == len(raw):
+        return raw[1:-1]
+    return ' '.join(raw.split())
+
+
+def _parse_body(text, start, end, line):
+    """Attributes and nested blocks of text[start:end]; `line` is the line
+    number of text[start]."""
+    attrs, blocks = {}, []
+    i = start
+    while i < end:
+        c = text[i]
+        if c.isspace() or c == ',':
+            i += 1
+            continue
+        skipped = _skip_comment(text, i) if c in '/#' else None
+        if skipped is not None:
+            i = skipped
+            continue
+        m = _IDENT.match(text, i)
+        if not m:
+            # Not something this parser understands (e.g. a bare expression); skip the line
+            nl = text.find('\n', i, end)
+            i = end if nl < 0 else nl + 1
+            continue
+        name, j = m.group(0), m.end()
+        while j < end and text[j] in ' \t':
+            j += 1
+        if j < end and text[j] == '=' and not text.startswith('==', j):
+            value_end = min(_value_end(text, j + 1), end)
+            attrs[name] = _clean_value(text[j + 1:value_end])
+            i = value_end
+            continue
+        labels = []
+        while j < end and text[j] in '"\t ':
+            if text[j] == '"':
+                k = _skip_string(text, j)
+                labels.append(text[j + 1:k - 1])
+                j = k
+            else:
+                j += 1
+        if j < end and text[j] == '{':
+            close = _skip_braces(text, j)
+            block_line = line + text.count('\n', start, i)
+            body = _parse_body(text, j + 1, close - 1, line + text.count('\n', start, j + 1))
+            blocks.append(dict(type=name, labels=labels, line=block_line, **body))
+            i = close
+        else:
+            nl = text.find('\n', i, end)
+            i = end if nl < 0 else nl + 1
+    return {'attrs': attrs, 'blocks': blocks}
+
+
+def parse_hcl(text):
+    """Top-level blocks of a Terraform file as dicts with ``type``, ``labels``,
+    ``line``, ``attrs`` (name -> source text, quotes removed from plain strings)
+    and nested ``blocks``."""
+    return _parse_body(text, 0, len(text), 1)['blocks']
+
+
+def parse_jenkinsfile(text):
+    """Pipeline stages in file order, each with the ACTION values its ``when``
+    condition accepts, the Terraform commands and module targets it runs and
+    the credentials it binds."""
+    stages = []
+    pos = 0
+    for m in _STAGE.finditer(text):
+        if m.start() < pos:
+            continue  # nested inside the previous stage (parallel branches)
+        close = _skip_braces(text, m.end() - 1, groovy=True)
+        body = text[m.end():close - 1]
+        when = re.search(r'\bwhen\s*\{', body)
+        condition = body[when.end() - 1:_skip_braces(body, when.end() - 1, groovy=True)] if when else ''
+        stages.append({
+            'name': m.group(2),
+            'line': text.count('\n', 0, m.start()) + 1,
+            'actions': sorted(set(_ACTION.findall(condition))),
+            'terraform': sorted(set(_TF_COMMAND.findall(body)), key=_TF_COMMAND_ORDER.index),
+            'targets': sorted(set(_TARGET.findall(body))),
+            'credentials': sorted(set(_CREDENTIAL.findall(body))),
+        })
+        pos = close
+    return stages
+
+
+PARSERS = {'hcl': parse_hcl, 'jenkinsfile': parse_jenkinsfile}
+
+
+class ParseCache:
+    """Parse results keyed on (parser, PARSER_VERSION, file content hash).
+
+    Results are kept in memory and, when `cache_dir` is given, as JSON under
+    ``<cache_dir>/parse/`` so later processes skip parsing unchanged files too.
+    """
+
+    def __init__(self, cache_dir=None):
+        self.dir = os.path.join(cache_dir, 'parse') if cache_dir else None
+        self.memo = {}
+        self.parsed = 0
+
+    def get(self, path, kind):
+        with open(path, 'rb') as f:
+            data = f.read()
+        key = hashlib.sha256(f'{kind}:{PARSER_VERSION}:'.encode() + data).hexdigest()
+        return self.memoize(key, lambda: PARSERS[kind](data.decode('utf-8')))
+
+    def memoize(self, key, compute):
+        """Return ``compute()`` (JSON-serializable), cached under the hex digest `key`."""
+        if key in self.memo:
+            return self.memo[key]
+        cached = os.path.join(self.dir, key + '.json') if self.dir else None
+        if cached and os.path.exists(cached):
+            with open(cached, encoding='utf-8') as f:
+                result = json.load(f)
+        else:
+            result = compute()
+            self.parsed += 1
+            if cached:
+                os.makedirs(self.dir, exist_ok=True)
+                tmp = f'{cached}.{os.getpid()}.tmp'
+                with open(tmp, 'w', encoding='utf-8') as f:
+                    json.dump(result, f)
+                os.replace(tmp, cached)
+        self.memo[key] = result
+        return result
+
+    def terraform(self, directory):
+        """Top-level blocks of every .tf file in `directory`, each tagged with its ``file``."""
+        blocks = []
+        for path in sorted(glob.glob(os.path.join(directory, '*.tf'))):
+            for block in self.get(path, 'hcl'):
+                blocks.append(dict(block, file=os.path.basename(path)))
+        return blocks
+
+
+def blocks_of(blocks, kind):
+    return [b for b in blocks if b['type'] == kind]
+
+
+def module_sources(root_blocks, root):
+    """``(name, directory, count)`` for every local module the root configuration calls."""
+    modules = []
+    for block in blocks_of(root_blocks, 'module'):
+        source = block['attrs'].get('source', '')
+        if source.startswith('.'):
+            modules.append((block['labels'][0], os.path.normpath(os.path.join(root, source)),
+                            block['attrs'].get('count')))
+    return modules
+
+
+def _ports(rule):
+    lo, hi = rule.get('from_port', '?'), rule.get('to_port', '?')
+    proto = rule.get('protocol', '?')
+    if proto == '-1':
+        return 'all traffic'
+    return f'{lo}/{proto}' if lo == hi else f'{lo}-{hi}/{proto}'
+
+
+def _sources(rule):
+    sources = []
+    for key in ('cidr_blocks', 'security_groups', 'source_security_group_id'):
+        if key in rule:
+            value = re.sub(r'\[\d+\]', '', rule[key].strip('[]').replace('"', '')).strip()
+            # aws_security_group.elb_sg.id -> elb_sg
+            sources.append(re.sub(r'\baws_security_group\.(\w+)\.id\b', r'\1', value))
+    return ', '.join(sources) or 'anywhere'
+
+
+def security_group_rules(blocks):
+    """``(name, description, [ingress rule summaries])`` per security group,
+    including standalone aws_security_group_rule resources."""
+    groups = []
+    for block in blocks_of(blocks, 'resource'):
+        rtype, name = block['labels'][:2]
+        if rtype == 'aws_security_group':
+            rules = [f'{_ports(b["attrs"])} from {_sources(b["attrs"])}'
+                     for b in block['blocks'] if b['type'] == 'ingress']
+            groups.append((name, block['attrs'].get('description', ''), rules))
+        elif rtype == 'aws_security_group_rule' and block['attrs'].get('type') == 'ingress':
+            attrs = block['attrs']
+            target = re.sub(r'\[\d+\]', '', attrs.get('security_group_id', ''))
+            groups.append((name, attrs.get('description', ''),
+                           [f'{_ports(attrs)} from {_sources(attrs)} to {target}']))
+    return groups
@@ -0,0 +1,171 @@
+"""
+Stage timings, Terraform resource counts and failures from Jenkins console logs.
+
+scan_log() makes a single pass over a console log, memory-mapping it one
+window at a time and looking only at the lines it cares about (stage markers,
+Terraform summaries, errors, the build result), so memory stays flat however
+large the log is. scan_logs() spreads several logs over a process pool.
+Timestamps come from the timestamps() option: ``[2025-11-29T10:15:32.123Z]``
+or ``10:15:32`` prefixes.
+"""
+import mmap
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+# Excerpt lines kept per stage; errors beyond this are only counted
+EXCERPTS_PER_STAGE = 4
+MAX_LINE = 300
+# Bytes mapped at a time; RSS is bounded by this, not by the log size
+WINDOW = 64 * 1024 * 1024
+
+# A literal prefilter finds candidate lines and only those are matched against
+# the full event pattern (with capturing groups re scans ~15x slower)
+_CANDIDATE = re.compile(rb'\[Pipeline\] |Stage "|Apply complete! |Destroy complete! |Plan: \d|ERROR: |Error: |Finished: ')
+_EVENT = re.compile(
+    rb'\[Pipeline\] (?P<stage>stage|\{ \((?P<name>.*)\)|// stage)\r?$'
+    rb'|Stage "[^"]+" skipped (?P<skipped>.*?)\r?$'
+    rb'|(?P<apply>Apply complete! Resources: (?P<a_add>\d+) added, (?P<a_chg>\d+) changed, (?P<a_del>\d+) destroyed)'
+    rb'|(?P<destroy>Destroy complete! Resources: (?P<d_del>\d+) destroyed)'
+    rb'|(?P<plan>Plan: (?P<p_add>\d+) to add, (?P<p_chg>\d+) to change, (?P<p_del>\d+) to destroy)'
+    rb'|(?<![\w-])(?P<error>ERROR|Error): '
+    rb'|Finished: (?P<result>[A-Z_]+)\r?$')
+_TIMESTAMP = re.compile(rb'^(?:\[(\d{4}-\d\d-\d\dT\d\d:\d\d:\d\d(?:\.\d+)?)Z?\]|(\d\d:\d\d:\d\d))\s')
+_ANSI = re.compile(r'\x1b\[[\d;]*[A-Za-z]')
+
+
+def _events(f, size):
+    """Yield ``(line, match)`` for every event line of the open file `f`,
+    mapping it WINDOW bytes at a time. Windows end on a line boundary."""
+    start = 0
+    window = WINDOW
+    while start < size:
+        offset = start - start % mmap.ALLOCATIONGRANULARITY
+        length = min(window, size - offset)
+        with mmap.mmap(f.fileno(), length, offset=offset, access=mmap.ACCESS_READ) as mm:
+            pos = start - offset
+            limit = length if offset + length == size else mm.rfind(b'\n', pos) + 1
+            if limit <= pos:
+                window *= 2  # a single line longer than the window
+                continue
+            while True:
+                m = _CANDIDATE.search(mm, pos, limit)
+                if m is None:
+                    break
+                line_end = mm.find(b'\n', m.start(), limit)
+                line_end = limit if line_end < 0 else line_end
+                event = _EVENT.match(mm, m.start(), line_end)
+                if event is None:
+                    pos = m.end()
+                    continue
+                line_start = mm.rfind(b'\n', 0, m.start()) + 1
+                yield mm[line_start:min(line_end, line_start + MAX_LINE)], event
+                pos = line_end + 1
+        start = offset + limit
+        window = WINDOW
+
+
+def _seconds(line, previous):
+    """Seconds since the epoch (ISO prefixes) or since midnight (clock
+    prefixes, unwrapped past `previous`) of a timestamped line, else None."""
+    m = _TIMESTAMP.match(line)
+    if not m:
+        return None
+    if m.group(1):
+        return datetime.fromisoformat(m.group(1).decode()).timestamp()
+    h, mi, s = (int(x) for x in m.group(2).split(b':'))
+    t = h * 3600 + mi * 60 + s
+    while previous is not None and t < previous - 12 * 3600:
+        t += 86400
+    return t
+
+
+def _text(line):
+    return _ANSI.sub('', line.decode('utf-8', 'replace')).rstrip('\r')
+
+
+def _new_stage(name, start):
+    return {'name': name, 'status': 'success', 'start': start, 'end': None, 'seconds': None,
+            'added': 0, 'changed': 0, 'destroyed': 0, 'planned': None, 'errors': 0, 'excerpts': []}
+
+
+def _note(stage, line, note):
+    if len(stage['excerpts']) < EXCERPTS_PER_STAGE:
+        stage['excerpts'].append((_text(line), note))
+
+
+def scan_log(path):
+    """Summarize one console log.
+
+    Returns ``path``, ``bytes``, ``result`` (the ``Finished:`` status, if the
+    build got that far) and ``stages`` in order of first appearance, each with
+    ``status`` (success/failed/skipped/unfinished), ``seconds`` (None without
+    timestamps), Terraform ``added``/``changed``/``destroyed`` counts, the last
+    ``planned`` (add, change, destroy), an ``errors`` count and a few annotated
+    ``excerpts`` as (line, note) pairs. Errors outside any stage are reported
+    under a final ``(outside stages)`` entry.
+    """
+    summary = {'path': path, 'bytes': os.path.getsize(path), 'result': None, 'stages': []}
+    open_stages = []
+    pending = False
+    last_time = None
+    outside = _new_stage('(outside stages)', None)
+    with open(path, 'rb') as f:
+        for line, m in _events(f, summary['bytes']):
+            kind = m.lastgroup
+            now = _seconds(line, last_time)
+            if now is not None:
+                last_time = now
+            current = open_stages[-1] if open_stages else outside
+            if kind == 'stage':
+                if m.group('name') is not None:
+                    # "{ (Name)" opens a stage only right after "[Pipeline] stage";
+                    # parallel branches use the same marker
+                    if pending:
+                        stage = _new_stage(m.group('name').decode('utf-8', 'replace'), now)
+                        summary['stages'].append(stage)
+                        open_stages.append(stage)
+                    pending = False
+                elif m.group('stage') == b'stage':
+                    pending = True
+                elif open_stages:
+                    stage = open_stages.pop()
+                    stage['end'] = now
+                    if stage['start'] is not None and now is not None:
+                        stage['seconds'] = round(now - stage['start'], 1)
+            elif kind == 'skipped':
+                current['status'] = 'skipped'
+                _note(current, line, 'skipped ' + m.group('skipped').decode('utf-8', 'replace'))
+            elif kind == 'apply':
+                for key, group in (('added', 'a_add'), ('changed', 'a_chg'), ('destroyed', 'a_del')):
+                    current[key] += int(m.group(group))
+                _note(current, line, 'terraform apply finished')
+            elif kind == 'destroy':
+                current['destroyed'] += int(m.group('d_del'))
+                _note(current, line, 'terraform destroy finished')
+            elif kind == 'plan':
+                current['planned'] = [int(m.group(g)) for g in ('p_add', 'p_chg', 'p_del')]
+                _note(current, line, 'terraform plan summary')
+            elif kind == 'error':
+                current['errors'] += 1
+                if current['status'] != 'skipped':
+                    current['status'] = 'failed'
+                _note(current, line, 'failure')
+            elif kind == 'result':
+                summary['result'] = m.group('result').decode()
+    for stage in open_stages:
+        if stage['status'] == 'success':
+            stage['status'] = 'unfinished'
+    if outside['errors']:
+        summary['stages'].append(outside)
+    return summary
+
+
+def scan_logs(paths, jobs=None):
+    """scan_log() for every path, in a process pool when there are several."""
+    paths = list(paths)
+    if len(paths) < 2 or jobs == 1:
+        return [scan_log(p) for p in paths]
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        return list(pool.map(scan_log, paths))
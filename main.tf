@@ -45,6 +45,7 @@ module "web" {
   # Database connection (if database is deployed)
   db_endpoint = var.deploy_database ? module.db[0].cluster_endpoint : ""
   db_password = var.deploy_database ? var.db_master_password : ""
+  probe_token = var.acceptance_probe_token
 }
 
 # Security Group Rule: Allow web tier to access database
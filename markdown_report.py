@@ -0,0 +1,166 @@
+"""
+Markdown reports as report content.
+
+markdown_events() reads a Markdown report (ATX headings, bullet and ordered
+lists, pipe tables, fenced code, paragraphs) line by line into content
+events, and render_markdown() plays them into a report_formats.Sink, so a
+.md converts to .docx (or any other sink) in one streaming pass. Inline
+markup is reduced to plain text: emphasis markers are dropped and links keep
+their target in parentheses.
+"""
+import re
+
+_MD_HEADING = re.compile(r'^(#{1,6})\s+(.*?)\s*#*\s*$')
+_MD_BULLET = re.compile(r'^(\s*)[-*+]\s+(.*)$')
+_MD_NUMBERED = re.compile(r'^(\s*)(\d{1,9})[.)]\s+(.*)$')
+_MD_RULE = re.compile(r'^\s*([-*_])(\s*\1){2,}\s*$')
+_MD_TABLE_SEP = re.compile(r'^\s*\|?\s*:?-+:?\s*(\|\s*:?-+:?\s*)*\|?\s*$')
+_MD_CELL_SPLIT = re.compile(r'(?<!\\)\|')
+_MD_LINK = re.compile(r'!?\[([^\]]*)\]\(([^)\s]+)[^)]*\)')
+_MD_EMPHASIS = re.compile(r'(\*\*|__|`)')
+
+
+class _Lines:
+    """Line iterator with one line of push-back for the Markdown parser."""
+
+    def __init__(self, lines):
+        self._it = iter(lines)
+        self._pushed = None
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self._pushed is not None:
+            line, self._pushed = self._pushed, None
+            return line
+        return next(self._it)
+
+    def push(self, line):
+        self._pushed = line
+
+
+def _md_inline(text):
+    text = _MD_LINK.sub(lambda m: m.group(1) if m.group(1) == m.group(2) else f'{m.group(1)} ({m.group(2)})', text)
+    return _MD_EMPHASIS.sub('', text).replace('\\|', '|')
+
+
+def _md_cells(line):
+    line = line.strip()
+    if line.startswith('|'):
+        line = line[1:]
+    if line.endswith('|') and not line.endswith('\\|'):
+        line = line[:-1]
+    return [_md_inline(c.strip()) for c in _MD_CELL_SPLIT.split(line)]
+
+
+def _md_table_rows(header, lines):
+    yield header
+    for line in lines:
+        if not line.lstrip().startswith('|'):
+            lines.push(line)
+            return
+        yield _md_cells(line)
+
+
+def _md_level(indent):
+    return len(indent.expandtabs(4)) // 2
+
+
+def read_markdown(path):
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            yield line.rstrip('\r\n')
+
+
+def markdown_events(lines):
+    """Turn Markdown lines into ``(kind, payload)`` content events in one pass.
+
+    Kinds are ``heading`` (depth, text), ``paragraph`` text, ``bullet``
+    (level, text), ``numbered`` (level, number, text), ``code`` line and
+    ``table`` rows. An ordered list is numbered from its first item on, as
+    Markdown renders it, whatever numbers the later items carry.
+
+    Nothing beyond the current paragraph is buffered; a ``table`` event carries a
+    lazy row iterator over the same lines, so it must be consumed before the next
+    event is requested.
+    """
+    lines = _Lines(lines)
+    para = []
+    # Next number of the open ordered list at each nesting level
+    numbers = {}
+    for line in lines:
+        stripped = line.strip()
+        if para and (not stripped or _MD_HEADING.match(line) or _MD_BULLET.match(line)
+                     or _MD_NUMBERED.match(line) or stripped.startswith(('```', '|'))):
+            yield 'paragraph', ''.join(para).rstrip()
+            para = []
+        if not stripped:
+            continue
+        if _MD_RULE.match(line):
+            numbers = {}
+            continue
+        m = _MD_BULLET.match(line)
+        if m:
+            level = _md_level(m.group(1))
+            numbers = {k: v for k, v in numbers.items() if k < level}
+            yield 'bullet', (level, _md_inline(m.group(2)))
+            continue
+        m = _MD_NUMBERED.match(line)
+        if m:
+            level = _md_level(m.group(1))
+            numbers = {k: v for k, v in numbers.items() if k <= level}
+            number = numbers.get(level, int(m.group(2)))
+            numbers[level] = number + 1
+            yield 'numbered', (level, number, _md_inline(m.group(3)))
+            continue
+        numbers = {}
+        if stripped.startswith('```'):
+            for code in lines:
+                if code.strip().startswith('```'):
+                    break
+                yield 'code', code
+            continue
+        m = _MD_HEADING.match(line)
+        if m:
+            yield 'heading', (len(m.group(1)), _md_inline(m.group(2)))
+            continue
+        if stripped.startswith('|'):
+            sep = next(lines, '')
+            if _MD_TABLE_SEP.match(sep):
+                yield 'table', _md_table_rows(_md_cells(line), lines)
+                continue
+            lines.push(sep)
+        if stripped.startswith('>'):
+            stripped = stripped.lstrip('> ')
+        # Two trailing spaces are a hard line break in Markdown
+        para.append(_md_inline(stripped) + ('\n' if line.endswith('  ') else ' '))
+    if para:
+        yield 'paragraph', ''.join(para).rstrip()
+
+
+def _md_heading_level(depth):
+    # '#' is the document title and '##' the chapters, both centered level 1
+    return max(1, min(depth - 1, 3))
+
+
+def _md_indent(level):
+    # 0.5in is the top list level, +0.25in per nesting level
+    return 0.5 + 0.25 * level
+
+
+def render_markdown(lines, sink):
+    """Play the Markdown report `lines` into `sink` (a report_formats.Sink)."""
+    for kind, payload in markdown_events(lines):
+        if kind == 'heading':
+            sink.heading(payload[1], _md_heading_level(payload[0]))
+        elif kind == 'paragraph':
+            sink.paragraph(payload)
+        elif kind == 'bullet':
+            sink.bullets([payload[1]], _md_indent(payload[0]))
+        elif kind == 'numbered':
+            sink.numbered([payload[2]], _md_indent(payload[0]), payload[1])
+        elif kind == 'code':
+            sink.lines([payload])
+        elif kind == 'table':
+            sink.table(payload)
@@ -0,0 +1,684 @@
+#!/usr/bin/env python3
+"""
+Merge finished .docx reports into one compendium without re-rendering them.
+
+    python merge_reports.py -o compendium.docx "Final Project Report_JA.docx" research_paper_capstone_JA.docx
+
+Works on the zip packages directly. Each document's body is copied as text
+with its relationship, style, list and bookmark/drawing ids rewritten in one
+regex pass; every document after the first starts a new section with its own
+page setup. Images and other related parts are copied byte for byte and stored
+once per distinct content. Styles are merged by id (identical definitions are
+shared, conflicting ones get a new id) and list definitions by content, each
+document keeping its own list instances so numbering restarts per document.
+A later document whose default paragraph style differs keeps it under a new
+id, with its document defaults folded in, and its unstyled paragraphs point
+at it, so a generated report keeps its Normal after a hand-made one.
+Settings, theme, fonts and document properties come from the first document.
+Only styles, numbering, relationship and content-type parts are parsed, so a
+merge costs about as much as copying the bytes. Needs lxml (a python-docx
+dependency).
+"""
+import argparse
+import hashlib
+import os
+import posixpath
+import re
+import sys
+import time
+import zipfile
+from functools import lru_cache
+
+from lxml import etree
+
+W_NS = 'http://schemas.openxmlformats.org/wordprocessingml/2006/main'
+R_NS = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+RELS_NS = 'http://schemas.openxmlformats.org/package/2006/relationships'
+CT_NS = 'http://schemas.openxmlformats.org/package/2006/content-types'
+OFFICE_DOCUMENT = R_NS + '/officeDocument'
+# Same entry metadata as create_final_report, so a merge is reproducible too
+ZIP_DATE_TIME = (1980, 1, 1, 0, 0, 0)
+ZIP_LEVEL = 6
+
+# Main-document relationships that exist once per package; the first
+# document's are kept and the others' dropped
+SHARED = {'styles', 'stylesWithEffects', 'numbering', 'settings', 'webSettings', 'fontTable', 'theme',
+          'customXml', 'footnotes', 'endnotes', 'comments', 'commentsExtended', 'commentsIds', 'people',
+          'glossaryDocument'}
+# Body references into parts that are not merged
+UNSUPPORTED = ('<w:footnoteReference', '<w:endnoteReference', '<w:commentReference')
+# A paragraph start and whatever pPr/pStyle opens it
+_PARAGRAPH = re.compile(r'<w:p(?P<attrs>\s[^>]*?)?(?P<empty>/?)>'
+                        r'(?:(?P<ppr><w:pPr(?:\s[^>]*?)?)(?P<pempty>/?)>(?P<styled><w:pStyle )?)?')
+_TRUE = ('1', 'true', 'on')
+
+
+def W(tag):
+    return f'{{{W_NS}}}{tag}'
+
+
+def _zip_info(name):
+    info = zipfile.ZipInfo(name, ZIP_DATE_TIME)
+    info.compress_type = zipfile.ZIP_DEFLATED
+    info.external_attr = 0o644 << 16
+    return info
+
+
+def _rels_name(name):
+    folder, base = posixpath.split(name)
+    return posixpath.join(folder, '_rels', base + '.rels')
+
+
+def _digest(el):
+    return hashlib.sha256(etree.tostring(el, method='c14n', exclusive=True)).digest()
+
+
+def _abstract_digest(el):
+    """Digest of a list definition, ignoring its id and the random nsid/tmpl."""
+    h = hashlib.sha256()
+    for key, value in sorted(el.attrib.items()):
+        if key != W('abstractNumId'):
+            h.update(f'{key}={value};'.encode())
+    for child in el:
+        if child.tag not in (W('nsid'), W('tmpl')):
+            h.update(etree.tostring(child, method='c14n', exclusive=True))
+    return h.digest()
+
+
+def _fold_defaults(style, doc_defaults):
+    """Copy the run and paragraph properties of `doc_defaults` that `style`
+    does not set into it, so it looks the same under other document defaults."""
+    for container, tag in (('pPrDefault', 'pPr'), ('rPrDefault', 'rPr')):
+        src = doc_defaults.find(f'{W(container)}/{W(tag)}')
+        if src is None or not len(src):
+            continue
+        dst = style.find(W(tag))
+        if dst is None:
+            dst = etree.Element(W(tag))
+            # pPr, rPr, then the table properties close a style
+            after = style.find(W('rPr')) if tag == 'pPr' else None
+            after = next((el for el in style if el.tag in (W('tblPr'), W('trPr'), W('tcPr'), W('tblStylePr'))),
+                         after)
+            if after is not None:
+                after.addprevious(dst)
+            else:
+                style.append(dst)
+        present = [el.tag for el in src]
+        for i, el in enumerate(src):
+            mine = dst.find(el.tag)
+            if mine is None:
+                # Keep schema order: before the next shared property, if any
+                following = next((dst.find(t) for t in present[i + 1:] if dst.find(t) is not None), None)
+                if following is not None:
+                    following.addprevious(etree.fromstring(etree.tostring(el)))
+                else:
+                    dst.append(etree.fromstring(etree.tostring(el)))
+                continue
+            for key, value in el.attrib.items():
+                # A theme font would override the style's explicit one
+                if key.endswith('Theme') and key[:-len('Theme')] in mine.attrib:
+                    continue
+                if key == W('cstheme') and W('cs') in mine.attrib:
+                    continue
+                if key not in mine.attrib:
+                    mine.set(key, value)
+
+
+def _based_first(styles):
+    """`styles` reordered so every style comes after the style it is based on."""
+    by_id = {style.get(W('styleId')): style for style in styles}
+    ordered, seen = [], set()
+
+    def visit(style):
+        sid = style.get(W('styleId'))
+        if sid in seen:
+            return
+        seen.add(sid)
+        base = style.find(W('basedOn'))
+        if base is not None and base.get(W('val')) in by_id:
+            visit(by_id[base.get(W('val'))])
+        ordered.append(style)
+
+    for style in styles:
+        visit(style)
+    return ordered
+
+
+def _restyle_default(content, style_id):
+    """Give every paragraph of `content` without a pStyle the style `style_id`."""
+    ref = f'<w:pStyle w:val="{style_id}"/>'
+
+    def restyle(m):
+        attrs = m.group('attrs') or ''
+        if m.group('empty'):
+            return f'<w:p{attrs}><w:pPr>{ref}</w:pPr></w:p>'
+        if m.group('ppr') is None:
+            return f'<w:p{attrs}><w:pPr>{ref}</w:pPr>'
+        if m.group('styled'):
+            return m.group(0)
+        if m.group('pempty'):
+            return f'<w:p{attrs}>{m.group("ppr")}>{ref}</w:pPr>'
+        return f'<w:p{attrs}>{m.group("ppr")}>{ref}'
+
+    return _PARAGRAPH.sub(restyle, content)
+
+
+@lru_cache(maxsize=None)
+def _references(r):
+    """Pattern for the ids a body refers to, with `r` bound to the relationships
+    namespace. Attributes are matched after a literal space, as Word and
+    python-docx write them (a \\b or \\s there makes the scan ~3x slower)."""
+    return re.compile(
+        r'<w:(?P<tag>pStyle|rStyle|tblStyle) w:val="(?P<style>[^"]*)"'
+        r'|<w:numId w:val="(?P<num>\d+)"'
+        rf'| {re.escape(r)}:(?P<attr>id|embed|link|pict|dm|lo|qs|cs)="(?P<rel>[^"]*)"'
+        r'|<(?P<marker>w:bookmarkStart|w:bookmarkEnd|wp:docPr) (?P<key>w:id|id)="(?P<id>\d+)"')
+
+
+def _root_tag(head, path):
+    """The ``<w:document ...>`` start tag, its namespace declarations and ignorable prefixes."""
+    m = re.search(r'<w:document\b[^>]*>', head)
+    if m is None:
+        raise ValueError(f'{path}: no <w:document> root')
+    tag = m.group(0)
+    namespaces = dict(re.findall(r'\sxmlns:([\w.-]+)="([^"]*)"', tag))
+    if namespaces.get('w') != W_NS:
+        raise ValueError(f'{path}: the "w" prefix is not WordprocessingML')
+    ignorable = re.search(r'\s[\w.-]+:Ignorable="([^"]*)"', tag)
+    return tag, namespaces, ignorable.group(1).split() if ignorable else []
+
+
+def _split_body(xml, path):
+    """(body content, final sectPr or '') of a document.xml string."""
+    m = re.search(r'<w:body\s*(/?)>', xml)
+    if m is None:
+        raise ValueError(f'{path}: no <w:body>')
+    if m.group(1):
+        return '', ''
+    body = xml[m.end():xml.rindex('</w:body>')].rstrip()
+    if not body.endswith(('</w:sectPr>', '/>')):
+        return body, ''
+    # The body-level sectPr is the last element; walk back to its start tag
+    # (a sectPrChange inside it holds a nested sectPr)
+    depth = 0
+    for tag in reversed(list(re.finditer(r'<w:sectPr\b[^>]*?(/?)>|</w:sectPr>', body))):
+        if tag.group(0) == '</w:sectPr>':
+            depth += 1
+            continue
+        if not tag.group(1):
+            depth -= 1
+        elif depth == 0 and tag.end() != len(body):
+            break
+        if depth == 0:
+            return body[:tag.start()], body[tag.start():]
+    return body, ''
+
+
+class Package:
+    """A .docx opened for reading: content types and relationships by part name."""
+
+    def __init__(self, path):
+        self.path = path
+        self.zip = zipfile.ZipFile(path)
+        self.names = set(self.zip.namelist())
+        types = etree.fromstring(self.zip.read('[Content_Types].xml'))
+        self.defaults = {el.get('Extension').lower(): el.get('ContentType')
+                         for el in types.iterfind(f'{{{CT_NS}}}Default')}
+        self.overrides = {el.get('PartName').lstrip('/'): el.get('ContentType')
+                          for el in types.iterfind(f'{{{CT_NS}}}Override')}
+        main = [target for _, rtype, target, _ in self.rels('') if rtype == OFFICE_DOCUMENT]
+        if not main:
+            raise ValueError(f'{path}: no main document part')
+        self.main = main[0]
+        # Source part name -> merged part name
+        self.copied = {}
+
+    def close(self):
+        self.zip.close()
+
+    def content_type(self, name):
+        return self.overrides.get(name) or self.defaults.get(name.rsplit('.', 1)[-1].lower())
+
+    def rels(self, name):
+        """(Id, Type, target, external) for each relationship of part `name`
+        ('' for the package); internal targets are resolved to part names."""
+        rels_name = _rels_name(name) if name else '_rels/.rels'
+        if rels_name not in self.names:
+            return []
+        result = []
+        for rel in etree.fromstring(self.zip.read(rels_name)).iterfind(f'{{{RELS_NS}}}Relationship'):
+            target = rel.get('Target')
+            external = rel.get('TargetMode') == 'External'
+            if not external:
+                target = (target[1:] if target.startswith('/')
+                          else posixpath.normpath(posixpath.join(posixpath.dirname(name), target)))
+            result.append((rel.get('Id'), rel.get('Type'), target, external))
+        return result
+
+    def shared_parts(self):
+        """Kind (e.g. ``styles``) -> (Id, part name) of the main document's shared parts."""
+        return {rtype.rsplit('/', 1)[-1]: (rid, target)
+                for rid, rtype, target, external in self.rels(self.main)
+                if not external and rtype.rsplit('/', 1)[-1] in SHARED}
+
+
+class Merger:
+    """Writes a merged package to the open zip file `zf`; add() every
+    document in order, then finish()."""
+
+    def __init__(self, zf):
+        self.zf = zf
+        self.written = set()
+        self.by_digest = {}
+        self.defaults = {}
+        self.overrides = {}
+        self.rels = {}
+        self.rel_ids = set()
+        self.shared = {}
+        self.documents = []
+        self.main = None
+        self.head = None
+        self.namespaces = {}
+        self.ignorable = []
+        self.styles = self.numbering = None
+        self.default_style = None
+        self.style_ids = {}
+        # Digest of a whole styles part -> its renames, for documents sharing a template
+        self.style_parts = {}
+        self.abstract_ids = {}
+        self.next_abstract = 0
+        self.next_num = 1
+        self.stats = dict.fromkeys(('documents', 'parts', 'parts shared', 'styles shared', 'styles added',
+                                    'styles renamed', 'lists shared'), 0)
+
+    def _write(self, name, data):
+        self.zf.writestr(_zip_info(name), data, compresslevel=ZIP_LEVEL)
+        self.written.add(name)
+
+    def _unique(self, name):
+        stem, ext = posixpath.splitext(name)
+        n = 2
+        while name in self.written:
+            name = f'{stem}-{n}{ext}'
+            n += 1
+        return name
+
+    def _content_type(self, name, content_type):
+        if content_type and self.defaults.setdefault(name.rsplit('.', 1)[-1].lower(), content_type) != content_type:
+            self.overrides[name] = content_type
+
+    def _relationship(self, rtype, target, external, rid=None):
+        """Id of the merged document's relationship to `target`, added if new."""
+        key = (rtype, target, external)
+        if key not in self.rels:
+            n = len(self.rel_ids) + 1
+            while rid is None or rid in self.rel_ids:
+                rid = f'rId{n}'
+                n += 1
+            self.rels[key] = rid
+            self.rel_ids.add(rid)
+        return self.rels[key]
+
+    def _copy_part(self, src, name):
+        """Copy part `name` of `src` and the parts it relates to; returns its
+        merged name. Parts with identical bytes are stored once."""
+        if name in src.copied:
+            return src.copied[name]
+        data = src.zip.read(name)
+        rels = None
+        rels_name = _rels_name(name)
+        if rels_name in src.names:
+            root = etree.fromstring(src.zip.read(rels_name))
+            for rel, (_, _, target, external) in zip(root.iterfind(f'{{{RELS_NS}}}Relationship'), src.rels(name)):
+                if not external and target in src.names:
+                    rel.set('Target', posixpath.relpath(self._copy_part(src, target), posixpath.dirname(name)))
+            rels = etree.tostring(root, xml_declaration=True, encoding='UTF-8', standalone=True)
+        content_type = src.content_type(name)
+        digest = hashlib.sha256(data)
+        digest.update(f'\0{content_type}\0'.encode())
+        digest.update(rels or b'')
+        digest = digest.digest()
+        if digest in self.by_digest:
+            self.stats['parts shared'] += 1
+        else:
+            # A new name stays in the same folder, so relative targets still hold
+            new = self._unique(name)
+            self._write(new, data)
+            if rels is not None:
+                self._write(_rels_name(new), rels)
+            self._content_type(new, content_type)
+            self.by_digest[digest] = new
+            self.stats['parts'] += 1
+        src.copied[name] = self.by_digest[digest]
+        return src.copied[name]
+
+    def add(self, path):
+        """Merge the related parts, styles and lists of the document at `path`;
+        its body is copied by finish()."""
+        src = Package(path)
+        try:
+            with src.zip.open(src.main) as f:
+                head = f.read(64 * 1024).decode('utf-8', 'ignore')
+            tag, namespaces, ignorable = _root_tag(head, path)
+            for prefix, uri in namespaces.items():
+                if self.namespaces.setdefault(prefix, uri) != uri:
+                    raise ValueError(f'{path}: prefix "{prefix}" is bound to {uri}, '
+                                     f'not {self.namespaces[prefix]} as in the documents before it')
+            self.ignorable += [p for p in ignorable if p not in self.ignorable]
+            for ext, content_type in src.defaults.items():
+                self.defaults.setdefault(ext, content_type)
+            shared = src.shared_parts()
+            if self.head is None:
+                self._base(src, tag, namespaces, shared)
+                styles, nums, default = {}, {}, None
+            else:
+                nums = self._merge_numbering(src, shared)
+                styles, default = self._merge_styles(src, shared, nums)
+            rel_ids = {}
+            for rid, rtype, target, external in src.rels(src.main):
+                kind = rtype.rsplit('/', 1)[-1]
+                if kind in SHARED and not external:
+                    if kind in self.shared:
+                        rel_ids[rid] = self.shared[kind]
+                    continue
+                if not external:
+                    if target not in src.names:
+                        continue
+                    target = posixpath.relpath(self._copy_part(src, target), posixpath.dirname(self.main))
+                rel_ids[rid] = self._relationship(rtype, target, external)
+            if not self.documents:
+                self._copy_package(src, shared)
+            self.documents.append((path, src.main, namespaces, rel_ids, styles, default, nums))
+            self.stats['documents'] += 1
+        finally:
+            src.close()
+
+    def _base(self, src, tag, namespaces, shared):
+        """Take the package-level parts, styles and lists of the first document."""
+        self.main = src.main
+        self.head = (tag, namespaces)
+        self._content_type(src.main, src.content_type(src.main))
+        for kind, (rid, target) in sorted(shared.items()):
+            self.shared[kind] = self._relationship(
+                next(t for i, t, _, _ in src.rels(src.main) if i == rid),
+                posixpath.relpath(target, posixpath.dirname(self.main)), False, rid)
+        if 'styles' not in shared:
+            raise ValueError(f'{src.path}: no styles part')
+        name = shared['styles'][1]
+        data = src.zip.read(name)
+        self.styles = (name, src.content_type(name), etree.fromstring(data))
+        self.style_parts[hashlib.sha256(data).digest()] = {}, None, len(self.styles[2].findall(W('style')))
+        self.written.add(name)
+        for style in self.styles[2].iterfind(W('style')):
+            self.style_ids[(style.get(W('styleId')), _digest(style))] = style.get(W('styleId'))
+            if style.get(W('type')) == 'paragraph' and style.get(W('default')) in _TRUE:
+                self.default_style = style.get(W('styleId'))
+        if 'numbering' in shared:
+            name = shared['numbering'][1]
+            root = etree.fromstring(src.zip.read(name))
+            self._numbering_part(name, src.content_type(name), root)
+            self.written.add(name)
+            for el in root.iterfind(W('abstractNum')):
+                self.abstract_ids.setdefault(_abstract_digest(el), el.get(W('abstractNumId')))
+                self.next_abstract = max(self.next_abstract, int(el.get(W('abstractNumId'))) + 1)
+            for el in root.iterfind(W('num')):
+                self.next_num = max(self.next_num, int(el.get(W('numId'))) + 1)
+
+    def _numbering_part(self, name, content_type, root):
+        # Later list definitions go before the first instance, instances before numIdMacAtCleanup
+        self.numbering = (name, content_type, root, root.find(W('num')), root.find(W('numIdMacAtCleanup')))
+
+    def _copy_package(self, src, shared):
+        """Copy the first document's parts not reached through the main
+        document's own relationships (properties, settings, theme, ...)."""
+        skip = {'[Content_Types].xml', src.main, _rels_name(src.main), self.styles[0]}
+        if self.numbering is not None:
+            skip.add(self.numbering[0])
+        skip.update(src.copied)
+        skip.update(_rels_name(name) for name in src.copied)
+        for name in sorted(src.names - skip):
+            if not name.endswith('/'):
+                self._write(name, src.zip.read(name))
+                self._content_type(name, src.content_type(name))
+
+    def _merge_numbering(self, src, shared):
+        """Add the lists of a later document; returns {old numId: new numId}.
+        Identical list definitions are shared; list instances never are, so a
+        list continued in one document does not continue into the next."""
+        if 'numbering' not in shared:
+            return {}
+        root = etree.fromstring(src.zip.read(shared['numbering'][1]))
+        if self.numbering is None:
+            name = self._unique(posixpath.join(posixpath.dirname(self.main), 'numbering.xml'))
+            rtype = next(t for i, t, _, _ in src.rels(src.main) if i == shared['numbering'][0])
+            self.shared['numbering'] = self._relationship(rtype, posixpath.basename(name), False)
+            self._numbering_part(name, src.content_type(shared['numbering'][1]),
+                                 etree.Element(W('numbering'), nsmap=root.nsmap))
+            self.written.add(name)
+        _, _, merged, first_num, tail = self.numbering
+        abstract = {}
+        for el in root.iterfind(W('abstractNum')):
+            digest = _abstract_digest(el)
+            if digest in self.abstract_ids:
+                self.stats['lists shared'] += 1
+            else:
+                self.abstract_ids[digest] = str(self.next_abstract)
+                self.next_abstract += 1
+                el.set(W('abstractNumId'), self.abstract_ids[digest])
+                if first_num is not None:
+                    first_num.addprevious(el)
+                elif tail is not None:
+                    tail.addprevious(el)
+                else:
+                    merged.append(el)
+            abstract[el.get(W('abstractNumId'))] = self.abstract_ids[digest]
+        nums = {}
+        for el in root.iterfind(W('num')):
+            nums[el.get(W('numId'))] = str(self.next_num)
+            self.next_num += 1
+            el.set(W('numId'), nums[el.get(W('numId'))])
+            ref = el.find(W('abstractNumId'))
+            if ref is not None:
+                ref.set(W('val'), abstract.get(ref.get(W('val')), ref.get(W('val'))))
+            if tail is not None:
+                tail.addprevious(el)
+            else:
+                merged.append(el)
+            if first_num is None:
+                first_num = el
+                self.numbering = self.numbering[:3] + (el, tail)
+        return nums
+
+    def _merge_styles(self, src, shared, nums):
+        """Add the styles of a later document; returns {old styleId: new styleId}
+        for the ones that clash with a different definition already merged, and
+        the new id of its default paragraph style if that had to be renamed."""
+        if 'styles' not in shared:
+            return {}, None
+        data = src.zip.read(shared['styles'][1])
+        part = hashlib.sha256(data).digest()
+        if part in self.style_parts:
+            renamed, default, count = self.style_parts[part]
+            self.stats['styles shared'] += count
+            return renamed, default
+        root = etree.fromstring(data)
+        styles = root.findall(W('style'))
+        default_sid = next((s.get(W('styleId')) for s in styles
+                            if s.get(W('type')) == 'paragraph' and s.get(W('default')) in _TRUE), None)
+        doc_defaults, base_defaults = root.find(W('docDefaults')), self.styles[2].find(W('docDefaults'))
+        if default_sid is not None and doc_defaults is not None and (
+                base_defaults is None or _digest(doc_defaults) != _digest(base_defaults)):
+            # The merged document keeps the first document's defaults
+            _fold_defaults(next(s for s in styles if s.get(W('styleId')) == default_sid), doc_defaults)
+        taken = set(self.style_ids.values())
+        renamed = {}
+        added = []
+        # Bases first, so a style based on a renamed one is compared as rebased
+        for style in _based_first(styles):
+            sid = style.get(W('styleId'))
+            base = style.find(W('basedOn'))
+            if base is not None and base.get(W('val')) in renamed:
+                base.set(W('val'), renamed[base.get(W('val'))])
+            key = (sid, _digest(style))
+            if key in self.style_ids:
+                self.stats['styles shared'] += 1
+            elif sid in taken and sid != default_sid and style.get(W('default')) in _TRUE:
+                # Unstyled runs and tables use the default styles; like Word's
+                # Insert > File, the first document's definition wins. The
+                # default paragraph style is renamed below instead, and the
+                # document's unstyled paragraphs pointed at it
+                self.style_ids[key] = sid
+                self.stats['styles shared'] += 1
+                continue
+            elif sid in taken:
+                n = 2
+                while f'{sid}{n}' in taken:
+                    n += 1
+                self.style_ids[key] = f'{sid}{n}'
+                added.append(style)
+                self.stats['styles renamed'] += 1
+            else:
+                self.style_ids[key] = sid
+                added.append(style)
+                self.stats['styles added'] += 1
+            taken.add(self.style_ids[key])
+            if self.style_ids[key] != sid:
+                renamed[sid] = self.style_ids[key]
+        merged = self.styles[2]
+        for style in added:
+            sid = style.get(W('styleId'))
+            style.attrib.pop(W('default'), None)
+            if sid in renamed:
+                style.set(W('styleId'), renamed[sid])
+                name = style.find(W('name'))
+                if name is not None:
+                    name.set(W('val'), f'{name.get(W("val"))} ({renamed[sid][len(sid):]})')
+            for ref in style:
+                if ref.tag in (W('next'), W('link')) and ref.get(W('val')) in renamed:
+                    ref.set(W('val'), renamed[ref.get(W('val'))])
+            for ref in style.iter(W('numId')):
+                ref.set(W('val'), nums.get(ref.get(W('val')), ref.get(W('val'))))
+            merged.append(style)
+        # Unstyled paragraphs would otherwise take the first document's default
+        default = renamed.get(default_sid, default_sid)
+        default = None if default == self.default_style else default
+        self.style_parts[part] = renamed, default, len(styles)
+        return renamed, default
+
+    def _body(self, index, path, main, namespaces, rel_ids, styles, default, nums, offset):
+        """Body text of one document with its ids rewritten, and the highest
+        bookmark/drawing id it uses."""
+        with zipfile.ZipFile(path) as zf:
+            xml = zf.read(main).decode('utf-8')
+        content, sect = _split_body(xml, path)
+        if index and any(marker in content for marker in UNSUPPORTED):
+            raise ValueError(f'{path}: footnotes, endnotes and comments cannot be merged')
+        r = next((p for p, uri in namespaces.items() if uri == R_NS), 'r')
+        top = offset - 1
+
+        def rewrite(m):
+            nonlocal top
+            if m.group('style') is not None:
+                new = styles.get(m.group('style'))
+                return m.group(0) if new is None else f'<w:{m.group("tag")} w:val="{new}"'
+            if m.group('num') is not None:
+                new = nums.get(m.group('num'))
+                return m.group(0) if new is None else f'<w:numId w:val="{new}"'
+            if m.group('rel') is not None:
+                new = rel_ids.get(m.group('rel'))
+                return m.group(0) if new is None else f' {r}:{m.group("attr")}="{new}"'
+            new = int(m.group('id')) + offset
+            top = max(top, new)
+            return f'<{m.group("marker")} {m.group("key")}="{new}"'
+
+        pattern = _references(r)
+        content, sect = pattern.sub(rewrite, content), pattern.sub(rewrite, sect)
+        if default is not None:
+            content = _restyle_default(content, default)
+        if index < len(self.documents) - 1:
+            # A paragraph carrying the document's own sectPr ends its section;
+            # the next document starts on a new page unless its sectPr says otherwise
+            return content + f'<w:p><w:pPr>{sect or "<w:sectPr/>"}</w:pPr></w:p>', top
+        return content + sect, top
+
+    def finish(self):
+        """Write the merged body, relationships, styles, lists and content types."""
+        if not self.documents:
+            raise ValueError('no documents to merge')
+        head, declared = self.head
+        extra = ''.join(f' xmlns:{p}="{uri}"' for p, uri in self.namespaces.items() if p not in declared)
+        ignorable = ' '.join(self.ignorable)
+        if re.search(r'\s[\w.-]+:Ignorable="', head):
+            head = re.sub(r'(\s[\w.-]+:Ignorable=")[^"]*"', lambda m: f'{m.group(1)}{ignorable}"', head, count=1)
+        elif ignorable:
+            mc = next(p for p, uri in self.namespaces.items()
+                      if uri == 'http://schemas.openxmlformats.org/markup-compatibility/2006')
+            extra += f' {mc}:Ignorable="{ignorable}"'
+        head = head[:-1] + extra + '>'
+        with self.zf.open(_zip_info(self.main), 'w', force_zip64=True) as out:
+            out.write(f"<?xml version='1.0' encoding='UTF-8' standalone='yes'?>\n{head}<w:body>".encode())
+            offset = 0
+            for index, document in enumerate(self.documents):
+                text, top = self._body(index, *document, offset)
+                out.write(text.encode('utf-8'))
+                offset = max(offset, top + 1)
+            out.write(b'</w:body></w:document>')
+        self.written.add(self.main)
+        root = etree.Element(f'{{{RELS_NS}}}Relationships', nsmap={None: RELS_NS})
+        for (rtype, target, external), rid in self.rels.items():
+            rel = etree.SubElement(root, f'{{{RELS_NS}}}Relationship', Id=rid, Type=rtype, Target=target)
+            if external:
+                rel.set('TargetMode', 'External')
+        self._write(_rels_name(self.main), etree.tostring(root, xml_declaration=True, encoding='UTF-8',
+                                                          standalone=True))
+        for part in (self.styles, self.numbering):
+            if part is not None:
+                name, content_type, root = part[:3]
+                self._write(name, etree.tostring(root, xml_declaration=True, encoding='UTF-8', standalone=True))
+                self._content_type(name, content_type)
+        root = etree.Element(f'{{{CT_NS}}}Types', nsmap={None: CT_NS})
+        for ext, content_type in sorted(self.defaults.items()):
+            etree.SubElement(root, f'{{{CT_NS}}}Default', Extension=ext, ContentType=content_type)
+        for name, content_type in sorted(self.overrides.items()):
+            etree.SubElement(root, f'{{{CT_NS}}}Override', PartName='/' + name, ContentType=content_type)
+        self._write('[Content_Types].xml', etree.tostring(root, xml_declaration=True, encoding='UTF-8',
+                                                          standalone=True))
+
+
+def merge(paths, output):
+    """Merge the .docx files `paths`, in order, into `output` (written
+    atomically). Returns counts of documents, parts and styles merged."""
+    tmp = f'{output}.{os.getpid()}.tmp'
+    try:
+        with zipfile.ZipFile(tmp, 'w', zipfile.ZIP_DEFLATED, compresslevel=ZIP_LEVEL) as zf:
+            merger = Merger(zf)
+            for path in paths:
+                merger.add(path)
+            merger.finish()
+        os.replace(tmp, output)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    return merger.stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('documents', nargs='+', help='.docx files, in order')
+    parser.add_argument('-o', '--output', required=True)
+    args = parser.parse_args()
+    start = time.perf_counter()
+    try:
+        stats = merge(args.documents, args.output)
+    except (OSError, ValueError, KeyError, zipfile.BadZipFile, etree.XMLSyntaxError) as e:
+        print(f'merge failed: {e}', file=sys.stderr)
+        return 1
+    size = sum(os.path.getsize(p) for p in args.documents)
+    print(f'merged {stats.pop("documents")} documents ({size / 1e6:.1f} MB) into {args.output} '
+          f'({os.path.getsize(args.output) / 1e6:.1f} MB) in {time.perf_counter() - start:.2f}s: '
+          + ', '.join(f'{n} {key}' for key, n in stats.items()))
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
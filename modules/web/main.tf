@@ -89,6 +89,7 @@ resource "aws_launch_template" "web_lt" {
   user_data = base64encode(templatefile("${path.module}/user_data.sh", {
     db_endpoint = var.db_endpoint
     db_password = var.db_password
+    probe_token = var.probe_token
   }))
   network_interfaces {
     device_index                = 0
@@ -23,6 +23,7 @@ cat > /var/www/html/config.php <<DBCONF
 \$db_name = "capstonedb";
 \$db_user = "admin";
 \$db_pass = "${db_password}";
+\$probe_token = "${probe_token}";
 DBCONF
 
 # Set permissions
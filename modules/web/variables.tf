@@ -18,3 +18,10 @@ variable "db_password" {
   type        = string
   sensitive   = true
 }
+
+variable "probe_token" {
+  description = "Shared secret the AT-03 acceptance probe sends in X-Acceptance-Probe (empty disables probe cleanup)"
+  type        = string
+  sensitive   = true
+  default     = ""
+}
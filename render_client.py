@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Thin client for the resident render daemon (create_final_report.py --serve).
+
+    python render_client.py -o report.docx [--spec report_spec.json] [--stream]
+                            [--jenkins-log LOG ...] [--database URL]
+    python render_client.py --stats | --shutdown
+
+Jobs are sent as one JSON line over a Unix socket and answered with one JSON
+line. This module only imports the standard library so that a job costs a
+socket round trip instead of an interpreter start plus python-docx imports.
+If no daemon is listening, the job is rendered in-process instead.
+"""
+import argparse
+import json
+import os
+import socket
+import sys
+import tempfile
+import time
+
+DEFAULT_SOCKET = os.environ.get('REPORT_RENDER_SOCKET') or os.path.join(
+    tempfile.gettempdir(), f'report-render-{os.getuid()}.sock')
+CONNECT_TIMEOUT = 1.0
+
+
+def send_message(sock, message):
+    sock.sendall(json.dumps(message).encode('utf-8') + b'\n')
+
+
+def read_message(rfile):
+    line = rfile.readline()
+    if not line:
+        raise ConnectionError('connection closed before a reply was received')
+    return json.loads(line)
+
+
+def request(message, socket_path=DEFAULT_SOCKET):
+    """Send one message to the daemon and return its reply. Raises OSError
+    (typically FileNotFoundError or ConnectionRefusedError) if it is not running."""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(CONNECT_TIMEOUT)
+        sock.connect(socket_path)
+        # Renders can take arbitrarily long; only the connect is bounded
+        sock.settimeout(None)
+        send_message(sock, message)
+        with sock.makefile('rb') as rfile:
+            return read_message(rfile)
+
+
+def _absolute_database(url):
+    # A relative sqlite path means the client's working directory
+    if url.startswith('sqlite:///'):
+        return 'sqlite:///' + os.path.abspath(url[len('sqlite:///'):])
+    return url
+
+
+def render(output, spec=None, stream=False, cache_dir=None, no_cache=False, socket_path=DEFAULT_SOCKET,
+           fallback=True, markdown=None, html=None, jenkins_logs=None, database=None):
+    """Render a report through the daemon, or in-process if it is down.
+
+    Returns the job result with ``via`` (``'daemon'`` or ``'local'``) and
+    ``latency`` (client-side wall time, including the round trip) added.
+    `spec` and `cache_dir` default to create_final_report's defaults;
+    `markdown` and `html` are optional extra output paths; `jenkins_logs` and
+    `database` stand in for the spec's, like create_final_report's
+    --jenkins-log and --database.
+    """
+    # The daemon has its own working directory
+    job = {'op': 'render', 'output': os.path.abspath(output), 'stream': stream, 'no_cache': no_cache,
+           'spec': os.path.abspath(spec) if spec else None,
+           'cache_dir': os.path.abspath(cache_dir) if cache_dir else None,
+           'markdown': os.path.abspath(markdown) if markdown else None,
+           'html': os.path.abspath(html) if html else None,
+           'jenkins_logs': [os.path.abspath(p) for p in jenkins_logs] if jenkins_logs else None,
+           'database': _absolute_database(database) if database else None}
+    start = time.perf_counter()
+    try:
+        result = dict(request(job, socket_path), via='daemon')
+    except OSError:
+        if not fallback:
+            raise
+        import create_final_report as report
+        result = dict(report.run_render_job(job), via='local')
+    result['latency'] = round(time.perf_counter() - start, 4)
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('-o', '--output', help='path of the .docx to write')
+    parser.add_argument('--spec', help='report spec (default: report_spec.json)')
+    parser.add_argument('--stream', action='store_true', help='stream the body to disk as it is built')
+    parser.add_argument('--markdown', metavar='PATH', help='also write the report as GitHub Markdown')
+    parser.add_argument('--html', metavar='PATH', help='also write the report as a static HTML page')
+    parser.add_argument('--jenkins-log', metavar='LOG', action='append',
+                        help='Jenkins console log for Appendix C (repeatable; default: the spec\'s paths)')
+    parser.add_argument('--database', metavar='URL', default=os.environ.get('REPORT_DATABASE_URL'),
+                        help='web app database for Appendix G (default: $REPORT_DATABASE_URL, else the spec\'s)')
+    parser.add_argument('--cache-dir', help='section fragment cache directory')
+    parser.add_argument('--no-cache', action='store_true', help='re-render every section')
+    parser.add_argument('--socket', default=DEFAULT_SOCKET, help=f'daemon socket (default: {DEFAULT_SOCKET})')
+    parser.add_argument('--no-fallback', action='store_true', help='fail instead of rendering in-process')
+    parser.add_argument('--stats', action='store_true', help='print the daemon\'s job statistics')
+    parser.add_argument('--shutdown', action='store_true', help='stop the daemon')
+    args = parser.parse_args(argv)
+
+    if args.stats or args.shutdown:
+        try:
+            reply = request({'op': 'stats' if args.stats else 'shutdown'}, args.socket)
+        except OSError as e:
+            print(f'no daemon at {args.socket}: {e}', file=sys.stderr)
+            return 1
+        print(json.dumps(reply, indent=2))
+        return 0
+
+    if not args.output:
+        parser.error('-o/--output is required')
+    try:
+        result = render(args.output, args.spec, args.stream, args.cache_dir, args.no_cache, args.socket,
+                        not args.no_fallback, args.markdown, args.html, args.jenkins_log, args.database)
+    except OSError as e:
+        print(f'no daemon at {args.socket}: {e}', file=sys.stderr)
+        return 1
+    if not result['ok']:
+        print(f'{args.output}: FAILED via {result["via"]} ({result["error"]})', file=sys.stderr)
+        return 1
+    print(f'{args.output}: rendered {result["rendered"]} of {result["sections"]} sections via {result["via"]} '
+          f'(render {result["seconds"]:.3f}s, latency {result["latency"]:.3f}s)')
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
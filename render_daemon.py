@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Resident render daemon for render_client.py (create_final_report.py --serve).
+
+RenderDaemon listens on a Unix socket and keeps the interpreter, python-docx
+and the styled template loaded between jobs, so a job only pays for
+rendering. Each request is one JSON line answered with one JSON line; jobs
+are run by create_final_report.run_render_job, which turns any failure into
+an ``{'ok': False, 'error': ...}`` reply, so a bad job never stops the
+server.
+"""
+import argparse
+import contextlib
+import json
+import os
+import signal
+import socket
+import socketserver
+import sys
+import time
+from collections import deque
+
+import create_final_report as report
+import render_client
+
+
+class _RenderHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        # One JSON message per line; a client may send several per connection
+        for line in self.rfile:
+            try:
+                message = json.loads(line)
+            except ValueError as e:
+                reply = {'ok': False, 'error': f'bad request: {e}'}
+            else:
+                reply = self.server.dispatch(message)
+            self.wfile.write(json.dumps(reply).encode('utf-8') + b'\n')
+            self.wfile.flush()
+            if self.server.stopping:
+                return
+
+
+class RenderDaemon(socketserver.UnixStreamServer):
+    """Render server for render_client.py, listening on a Unix socket.
+
+    The interpreter, python-docx and the styled template stay loaded between
+    jobs, so a job only pays for rendering. Jobs run one at a time (rendering
+    is CPU bound; use --batch to spread variants over cores). Operations:
+    ``render``, ``stats`` and ``shutdown``.
+    """
+
+    def __init__(self, socket_path=render_client.DEFAULT_SOCKET, history=1000):
+        _claim_socket(socket_path)
+        super().__init__(socket_path, _RenderHandler)
+        os.chmod(socket_path, 0o600)
+        self.socket_path = socket_path
+        self.template = report.prepare_template()
+        self.started = time.time()
+        self.jobs = self.failed = 0
+        self.latencies = deque(maxlen=history)
+        self.stopping = False
+
+    def dispatch(self, message):
+        op = message.get('op')
+        if op == 'render':
+            result = report.run_render_job(message, self.template)
+            self.jobs += 1
+            self.failed += not result['ok']
+            self.latencies.append(result['seconds'])
+            status = f'rendered {result["rendered"]} of {result["sections"]} sections' if result['ok'] \
+                else f'FAILED ({result["error"]})'
+            print(f'{result["output"]}: {status} in {result["seconds"]:.3f}s', flush=True)
+            return result
+        if op == 'stats':
+            return dict(self.stats(), ok=True)
+        if op == 'shutdown':
+            self.stopping = True
+            return dict(self.stats(), ok=True)
+        return {'ok': False, 'error': f'unknown op {op!r}'}
+
+    def stats(self):
+        """Job counts and render latency (seconds) over the last `history` jobs."""
+        latency = sorted(self.latencies)
+
+        def pct(q):
+            return latency[min(len(latency) - 1, int(q * len(latency)))] if latency else None
+        return {
+            'socket': self.socket_path, 'pid': os.getpid(),
+            'uptime_seconds': round(time.time() - self.started, 1),
+            'jobs': self.jobs, 'failed': self.failed,
+            'latency': {'mean': round(sum(latency) / len(latency), 4) if latency else None,
+                        'p50': pct(0.5), 'p95': pct(0.95), 'max': latency[-1] if latency else None},
+        }
+
+    def serve(self):
+        try:
+            while not self.stopping:
+                self.handle_request()
+        finally:
+            self.server_close()
+            with contextlib.suppress(FileNotFoundError):
+                os.unlink(self.socket_path)
+
+
+def _claim_socket(path):
+    # A leftover socket file from a daemon that died is removed; a live one is not
+    if not os.path.exists(path):
+        return
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+        try:
+            probe.connect(path)
+        except OSError:
+            os.unlink(path)
+            return
+    raise RuntimeError(f'a render daemon is already listening on {path}')
+
+
+def serve(socket_path=render_client.DEFAULT_SOCKET):
+    """Run the render daemon until a ``shutdown`` request, SIGTERM or Ctrl-C."""
+    daemon = RenderDaemon(socket_path)
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    print(f'render daemon listening on {socket_path} (pid {os.getpid()})', flush=True)
+    with contextlib.suppress(KeyboardInterrupt):
+        daemon.serve()
+    stats = daemon.stats()
+    print(f'render daemon stopped after {stats["jobs"]} jobs ({stats["failed"]} failed)', flush=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--socket', default=render_client.DEFAULT_SOCKET,
+                        help=f'Unix socket to listen on (default: {render_client.DEFAULT_SOCKET})')
+    args = parser.parse_args(argv)
+    try:
+        serve(args.socket)
+    except RuntimeError as e:
+        print(e, file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
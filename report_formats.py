@@ -0,0 +1,263 @@
+"""
+Content sinks for the report generator.
+
+A report is rendered as one ordered stream of content calls (title page,
+headings, paragraphs, line blocks, bullet and numbered lists, tables,
+references, page breaks) against a Sink. MarkdownWriter and HtmlWriter turn that stream into
+GitHub Markdown and static HTML as it arrives; the .docx writer lives in
+create_final_report.py. FanOut forwards every call to several sinks, so all
+formats come out of a single pass over the spec, and tables reach each sink
+in row chunks, so a streamed table is never held whole.
+"""
+import html
+import itertools
+import re
+
+CHUNK_ROWS = 1000
+
+HTML_STYLE = '''body { font-family: "Times New Roman", Times, serif; font-size: 12pt; line-height: 1.5;
+       max-width: 6.5in; margin: 1in auto; }
+h1, h2 { text-align: center; }
+h2 { font-size: 16pt; } h3 { font-size: 13pt; } h4 { font-size: 12pt; }
+p.body { text-indent: 0.5in; }
+p.reference { padding-left: 0.5in; text-indent: -0.5in; }
+pre { font-family: "Courier New", monospace; font-size: 10pt; overflow-x: auto; }
+table { border-collapse: collapse; margin: 0 auto 1em; }
+th, td { border: 1px solid #000; padding: 2px 6px; text-align: left; }
+header.title-page { margin-top: 2in; text-align: center; }
+hr.page-break { border: 0; break-after: page; }'''
+
+HTML_TAIL = '</body>\n</html>\n'
+
+# Line starts Markdown would read as a heading, list item, quote or table row
+_MD_BLOCK_START = re.compile(r'^(\s*\d*)([#>|+*-]|(?<=\d)[.)])(?=\s|$)')
+# A run of '#' ending a heading that Markdown would drop as its closing sequence
+_MD_CLOSING_HASHES = re.compile(r'(^|\s)(#+)$')
+
+
+class Sink:
+    """Receives report content in document order.
+
+    Tables arrive as ``begin_table(header)``, any number of
+    ``table_rows(rows)`` chunks and ``end_table()``; `table` drives those from
+    a row iterator (header first).
+    """
+
+    def title_page(self, title, author, institution, course, date):
+        raise NotImplementedError
+
+    def heading(self, text, level=1):
+        raise NotImplementedError
+
+    def paragraph(self, text, indent=True):
+        raise NotImplementedError
+
+    def lines(self, lines):
+        """Preformatted lines (ASCII diagrams, log excerpts)."""
+        raise NotImplementedError
+
+    def bullets(self, items, indent=0.5):
+        raise NotImplementedError
+
+    def numbered(self, items, indent=0.5, start=1):
+        raise NotImplementedError
+
+    def references(self, items):
+        raise NotImplementedError
+
+    def page_break(self):
+        raise NotImplementedError
+
+    def begin_table(self, header):
+        raise NotImplementedError
+
+    def table_rows(self, rows):
+        raise NotImplementedError
+
+    def end_table(self):
+        raise NotImplementedError
+
+    def table(self, rows, chunk_rows=CHUNK_ROWS):
+        rows = iter(rows)
+        self.begin_table([str(c) for c in next(rows)])
+        while True:
+            chunk = list(itertools.islice(rows, chunk_rows))
+            if not chunk:
+                break
+            self.table_rows(chunk)
+        self.end_table()
+
+
+def _fan(name):
+    def forward(self, *args):
+        for sink in self.sinks:
+            getattr(sink, name)(*args)
+    forward.__name__ = name
+    return forward
+
+
+class FanOut(Sink):
+    """Forwards every call to each of `sinks` in turn."""
+
+    def __init__(self, sinks):
+        self.sinks = list(sinks)
+
+    title_page = _fan('title_page')
+    heading = _fan('heading')
+    paragraph = _fan('paragraph')
+    lines = _fan('lines')
+    bullets = _fan('bullets')
+    numbered = _fan('numbered')
+    references = _fan('references')
+    page_break = _fan('page_break')
+    begin_table = _fan('begin_table')
+    table_rows = _fan('table_rows')
+    end_table = _fan('end_table')
+
+
+def fan_out(sinks):
+    """A sink feeding all of `sinks`: the sink itself when there is only one,
+    so a single format keeps its own (possibly faster) table path."""
+    sinks = list(sinks)
+    return sinks[0] if len(sinks) == 1 else FanOut(sinks)
+
+
+def _md_text(text):
+    lines = str(text).replace('\r\n', '\n').split('\n')
+    # Two trailing spaces are a hard line break in Markdown
+    return '  \n'.join(_MD_BLOCK_START.sub(r'\1\\\2', line) for line in lines)
+
+
+def _md_heading(text):
+    # A heading is a single line
+    text = _md_text(' '.join(str(text).replace('\r\n', '\n').split('\n')))
+    return _MD_CLOSING_HASHES.sub(r'\1\\\2', text)
+
+
+def _md_cell(value):
+    text = str(value)
+    if '|' in text:
+        text = text.replace('|', '\\|')
+    if '\n' in text:
+        text = text.replace('\r\n', '\n').replace('\n', '<br>')
+    return text
+
+
+def _md_list_depth(indent):
+    # Inverse of markdown_report: 0.5in is the top level, +0.25in per level
+    return max(0, round((indent - 0.5) / 0.25))
+
+
+class MarkdownWriter(Sink):
+    """GitHub Markdown laid out like the hand-kept ``Final Project Report_JA.md``:
+    chapters are ``##`` headings after a thematic break, references a list.
+    Markdown has no pages, so page breaks are dropped."""
+
+    def __init__(self, out):
+        self.out = out
+
+    def title_page(self, title, author, institution, course, date):
+        first, *rest = str(title).split('\n')
+        parts = [f'# {_md_heading(first)}\n\n'] + [f'{_md_text(line)}\n\n' for line in rest]
+        parts.append(f'Author: {author}  \nInstitution: {institution}  \nCourse: {course}  \nDate: {date}\n\n')
+        self.out.write(''.join(parts))
+
+    def heading(self, text, level=1):
+        rule = '---\n\n' if level == 1 else ''
+        self.out.write(f'{rule}{"#" * (level + 1)} {_md_heading(text)}\n\n')
+
+    def paragraph(self, text, indent=True):
+        self.out.write(_md_text(text) + '\n\n')
+
+    def lines(self, lines):
+        lines = list(lines)
+        fence = '~~~' if any('```' in line for line in lines) else '```'
+        self.out.write(f'{fence}text\n' + ''.join(f'{line}\n' for line in lines) + f'{fence}\n\n')
+
+    def bullets(self, items, indent=0.5):
+        pad = '  ' * _md_list_depth(indent)
+        self.out.write(''.join(f'{pad}- {_md_text(it)}\n' for it in items) + '\n')
+
+    def numbered(self, items, indent=0.5, start=1):
+        pad = '  ' * _md_list_depth(indent)
+        self.out.write(''.join(f'{pad}{n}. {_md_text(it)}\n' for n, it in enumerate(items, start)) + '\n')
+
+    def references(self, items):
+        self.bullets(items)
+
+    def page_break(self):
+        pass
+
+    def begin_table(self, header):
+        self.out.write('| ' + ' | '.join(_md_cell(c) for c in header) + ' |\n'
+                       + '|' + '---|' * len(header) + '\n')
+
+    def table_rows(self, rows):
+        self.out.write(''.join('| ' + ' | '.join(map(_md_cell, row)) + ' |\n' for row in rows))
+
+    def end_table(self):
+        self.out.write('\n')
+
+
+def _html_text(text):
+    text = str(text)
+    if '&' in text or '<' in text or '>' in text:
+        text = html.escape(text, quote=False)
+    if '\n' in text:
+        text = text.replace('\n', '<br>')
+    return text
+
+
+def html_head(title):
+    """Start of a standalone HTML report; close it with `HTML_TAIL`."""
+    return (f'<!DOCTYPE html>\n<html lang="en">\n<head>\n<meta charset="utf-8">\n'
+            f'<title>{html.escape(title)}</title>\n<style>\n{HTML_STYLE}\n</style>\n</head>\n<body>\n')
+
+
+class HtmlWriter(Sink):
+    """Static HTML body content; `html_head` and `HTML_TAIL` wrap it into a
+    page styled after the .docx (Times, centered chapter headings, ruled
+    tables, page breaks when printed)."""
+
+    def __init__(self, out):
+        self.out = out
+
+    def title_page(self, title, author, institution, course, date):
+        lines = ''.join(f'<p>{_html_text(line)}</p>\n' for line in (author, institution, course, date))
+        self.out.write(f'<header class="title-page">\n<h1>{_html_text(title)}</h1>\n{lines}</header>\n')
+        self.page_break()
+
+    def heading(self, text, level=1):
+        self.out.write(f'<h{level + 1}>{_html_text(text)}</h{level + 1}>\n')
+
+    def paragraph(self, text, indent=True):
+        self.out.write(f'<p class="{"body" if indent else "plain"}">{_html_text(text)}</p>\n')
+
+    def lines(self, lines):
+        self.out.write('<pre>' + '\n'.join(html.escape(line, quote=False) for line in lines) + '</pre>\n')
+
+    def bullets(self, items, indent=0.5):
+        style = '' if indent == 0.5 else f' style="margin-left: {indent}in"'
+        self.out.write(f'<ul{style}>\n' + ''.join(f'<li>{_html_text(it)}</li>\n' for it in items) + '</ul>\n')
+
+    def numbered(self, items, indent=0.5, start=1):
+        style = '' if indent == 0.5 else f' style="margin-left: {indent}in"'
+        first = '' if start == 1 else f' start="{start}"'
+        self.out.write(f'<ol{first}{style}>\n' + ''.join(f'<li>{_html_text(it)}</li>\n' for it in items) + '</ol>\n')
+
+    def references(self, items):
+        self.out.write(''.join(f'<p class="reference">{_html_text(it)}</p>\n' for it in items))
+
+    def page_break(self):
+        self.out.write('<hr class="page-break">\n')
+
+    def begin_table(self, header):
+        self.out.write('<table>\n<thead><tr>' + ''.join(f'<th>{_html_text(c)}</th>' for c in header)
+                       + '</tr></thead>\n<tbody>\n')
+
+    def table_rows(self, rows):
+        self.out.write(''.join('<tr><td>' + '</td><td>'.join(map(_html_text, row)) + '</td></tr>\n'
+                               for row in rows))
+
+    def end_table(self):
+        self.out.write('</tbody>\n</table>\n')
@@ -0,0 +1,63 @@
+"""Regression checks for the report build cache, the streaming writer and
+merge_reports. Run with ``python -m pytest -q``."""
+import os
+import shutil
+
+import pytest
+from docx import Document
+
+import create_final_report as report
+import merge_reports
+
+
+@pytest.fixture(autouse=True)
+def _fixed_date(monkeypatch):
+    monkeypatch.setenv('SOURCE_DATE_EPOCH', '1700000000')
+
+
+def _read(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def test_rebuild_is_byte_identical_and_renders_nothing(tmp_path):
+    cache = str(tmp_path / 'cache')
+    first, second = str(tmp_path / 'first.docx'), str(tmp_path / 'second.docx')
+    total, rendered = report.generate_report(first, cache_dir=cache)
+    assert rendered == total > 0
+
+    assert report.generate_report(second, cache_dir=cache) == (total, 0)
+    assert _read(second) == _read(first)
+
+    # Without the finished artifact every section is spliced from the fragment cache
+    shutil.rmtree(os.path.join(cache, 'artifacts'))
+    os.remove(second)
+    assert report.generate_report(second, cache_dir=cache) == (total, 0)
+    assert _read(second) == _read(first)
+
+
+def test_streamed_build_matches_in_memory_build(tmp_path):
+    memory, streamed = str(tmp_path / 'memory.docx'), str(tmp_path / 'streamed.docx')
+    report.generate_report(memory, cache_dir=None)
+    report.generate_report(streamed, stream=True, cache_dir=None)
+    assert _read(streamed) == _read(memory)
+
+
+def test_merged_reports_open_in_python_docx(tmp_path):
+    cache = str(tmp_path / 'cache')
+    parts = []
+    for name in ('a.docx', 'b.docx'):
+        path = str(tmp_path / name)
+        report.generate_report(path, cache_dir=cache)
+        parts.append(path)
+    merged = str(tmp_path / 'merged.docx')
+    merge_reports.merge(parts, merged)
+
+    texts = [[p.text for p in Document(path).paragraphs] for path in parts]
+    doc = Document(merged)
+    merged_texts = [p.text for p in doc.paragraphs]
+    assert len(doc.tables) == 2 * len(Document(parts[0]).tables)
+    # Both copies are there in order, the second after a section break
+    assert merged_texts[:len(texts[0])] == texts[0]
+    assert merged_texts[-len(texts[1]):] == texts[1]
+    assert len(doc.sections) == 2
@@ -78,6 +78,13 @@ variable "db_master_password" {
   sensitive   = true
 }
 
+variable "acceptance_probe_token" {
+  type        = string
+  description = "Shared secret for the AT-03 probe (acceptance_probes.py --probe-token); empty disables cleanup"
+  sensitive   = true
+  default     = ""
+}
+
 # Conditional deployment variables
 variable "deploy_database" {
   description = "Whether to deploy the database tier"
@@ -59,31 +59,67 @@ if ($count == 0) {
     ('Lucid','Air Grand Touring',2024,169000,'Electric','Sedan','Dual-Motor AWD',1111,'Stellar White',580,'Single-Speed','Electric','Longest range EV at 516 miles. DreamDrive Pro semi-autonomous driving and Glass Cockpit display.','https://images.unsplash.com/photo-1621007947382-bb3c3994e3fb?w=400')");
 }
 
+// Create inquiries table if not exists
+$conn->query("CREATE TABLE IF NOT EXISTS inquiries (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    car_id VARCHAR(100),
+    customer_name VARCHAR(100),
+    email VARCHAR(100),
+    phone VARCHAR(20),
+    message TEXT,
+    inquiry_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    status VARCHAR(20) DEFAULT 'new',
+    INDEX idx_inquiries_car_id (car_id)
+)");
+
+// Migration: tables created before idx_inquiries_car_id existed do not get it
+// from CREATE TABLE IF NOT EXISTS, so add it once where it is missing
+$idx = $conn->query("SELECT 1 FROM information_schema.statistics WHERE table_schema = DATABASE()
+    AND table_name = 'inquiries' AND index_name = 'idx_inquiries_car_id' LIMIT 1");
+if ($idx && $idx->num_rows == 0) {
+    try {
+        $conn->query("CREATE INDEX idx_inquiries_car_id ON inquiries (car_id)");
+    } catch (mysqli_sql_exception $e) {
+        // A concurrent request added it first
+    }
+}
+
 // Handle customer inquiries if submitted
-if ($_POST['action'] ?? '' == 'submit_inquiry') {
+if (($_POST['action'] ?? '') == 'submit_inquiry') {
     $inquiry_car = $_POST['car_id'] ?? 'General';
     $inquiry_name = $_POST['name'] ?? '';
     $inquiry_email = $_POST['email'] ?? '';
     $inquiry_phone = $_POST['phone'] ?? '';
     $inquiry_message = $_POST['message'] ?? '';
     
-    // Create inquiries table if not exists
-    $conn->query("CREATE TABLE IF NOT EXISTS inquiries (
-        id INT AUTO_INCREMENT PRIMARY KEY,
-        car_id VARCHAR(100),
-        customer_name VARCHAR(100),
-        email VARCHAR(100),
-        phone VARCHAR(20),
-        message TEXT,
-        inquiry_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        status VARCHAR(20) DEFAULT 'new'
-    )");
-    
-    // Insert inquiry
-    $stmt = $conn->prepare("INSERT INTO inquiries (car_id, customer_name, email, phone, message) VALUES (?, ?, ?, ?, ?)");
-    $stmt->bind_param("sssss", $inquiry_car, $inquiry_name, $inquiry_email, $inquiry_phone, $inquiry_message);
-    $stmt->execute();
-    $inquiry_success = true;
+    // Insert inquiry, then read it back so success means the row is stored.
+    // Acceptance probe rows (AT-03) are tagged and deleted once read back, so
+    // the check leaves no leads behind. Only a request carrying the deployment's
+    // probe token (config.php, X-Acceptance-Probe header) counts as a probe
+    $probe_header = $_SERVER['HTTP_X_ACCEPTANCE_PROBE'] ?? '';
+    $inquiry_probe = $inquiry_car === 'acceptance-probe' && !empty($probe_token)
+        && hash_equals($probe_token, $probe_header);
+    $inquiry_status = $inquiry_probe ? 'probe' : 'new';
+    $stmt = $conn->prepare("INSERT INTO inquiries (car_id, customer_name, email, phone, message, status) VALUES (?, ?, ?, ?, ?, ?)");
+    if ($stmt && $stmt->bind_param("ssssss", $inquiry_car, $inquiry_name, $inquiry_email, $inquiry_phone, $inquiry_message, $inquiry_status)
+            && $stmt->execute()) {
+        $inquiry_id = (int)$conn->insert_id;
+        $stored = $conn->query("SELECT id FROM inquiries WHERE id = $inquiry_id");
+        if ($stored && $stored->num_rows == 1) {
+            $inquiry_success = true;
+        }
+        if ($inquiry_probe) {
+            // Only this request's row: overlapping probe runs read back their own
+            $cleanup = $conn->prepare("DELETE FROM inquiries WHERE id = ?");
+            if ($cleanup && $cleanup->bind_param("i", $inquiry_id)) {
+                $cleanup->execute();
+            }
+        }
+    }
+    if (!isset($inquiry_success)) {
+        $inquiry_error = true;
+        http_response_code(500);
+    }
 }
 
 // Handle filters
@@ -1018,6 +1054,9 @@ while ($row = $r->fetch_assoc()) $catList[] = $row['category'];
     </div>
 </div>
 
+<?php if (isset($inquiry_success)): ?>
+<div id="inquiry-receipt" data-inquiry-stored="<?php echo $inquiry_id; ?>" hidden></div>
+<?php endif; ?>
 <script>
 let currentCar = null;
 let wishlist = JSON.parse(localStorage.getItem('capstoneWishlist') || '[]');
@@ -1025,6 +1064,8 @@ let wishlist = JSON.parse(localStorage.getItem('capstoneWishlist') || '[]');
 // Display success message if inquiry was submitted
 <?php if (isset($inquiry_success)): ?>
 showSuccessAlert('✅ Thank you! Your inquiry has been submitted successfully. We\'ll contact you within 24 hours.');
+<?php elseif (isset($inquiry_error)): ?>
+showSuccessAlert('⚠️ Sorry, your inquiry could not be saved. Please try again or call us.');
 <?php endif; ?>
 
 function showDetails(car) {